@@ -5,10 +5,14 @@ import sys
 import os
 
 sys.path.append(os.path.join(sys.path[0], 'app'))  # Add app folder to path
+from app.core import settings
 from app.database import Base  # import your declarative base
+import app.models  # noqa: F401 - registers every model on Base.metadata
 
 config = context.config
 fileConfig(config.config_file_name)
+# same DATABASE_URL as the application (the value in alembic.ini is only a fallback)
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
 target_metadata = Base.metadata  # this tells Alembic about your models
 
 def run_migrations_offline():
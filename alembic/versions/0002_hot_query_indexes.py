@@ -0,0 +1,50 @@
+"""hot query indexes
+
+Composite indexes behind the frequent filters:
+- tickets(agent_id, status): least-loaded agent lookup on ticket creation
+- tickets(user_id, created_at) / tickets(agent_id, created_at): ticket listings
+- tickets(id) WHERE status = 'requested_reopen': admin reopen queue
+- messages(ticket_id, timestamp): chat history of a ticket
+- ticket_transfers(status): pending transfer requests
+
+Built CONCURRENTLY so a live database keeps taking writes; that cannot run
+inside a transaction, hence the autocommit blocks.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 08:25:12.401873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tickets_agent_id_status', 'tickets', ['agent_id', 'status'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_tickets_user_id_created_at', 'tickets', ['user_id', 'created_at'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_tickets_agent_id_created_at', 'tickets', ['agent_id', 'created_at'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_tickets_requested_reopen', 'tickets', ['id'], unique=False, postgresql_where=sa.text("status = 'requested_reopen'"), postgresql_concurrently=True)
+        op.create_index('ix_messages_ticket_id_timestamp', 'messages', ['ticket_id', 'timestamp'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_ticket_transfers_status'), 'ticket_transfers', ['status'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_ticket_transfers_status'), table_name='ticket_transfers', postgresql_concurrently=True)
+        op.drop_index('ix_messages_ticket_id_timestamp', table_name='messages', postgresql_concurrently=True)
+        op.drop_index('ix_tickets_requested_reopen', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('ix_tickets_agent_id_created_at', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('ix_tickets_user_id_created_at', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('ix_tickets_agent_id_status', table_name='tickets', postgresql_concurrently=True)
@@ -0,0 +1,53 @@
+"""ticket search
+
+pg_trgm GIN indexes for substring search on tickets.title, users.name and
+users.email, and a stored tsvector over title and initial_description for
+ranked full-text search (app/operations/search.py).
+
+Adding the generated column rewrites the tickets table under an exclusive
+lock; run it in a maintenance window on large databases. The indexes are
+built CONCURRENTLY afterwards.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:02:47.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('tickets', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english', coalesce(title, '') || ' ' || coalesce(initial_description, ''))", persisted=True),
+        nullable=True,
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tickets_search_vector', 'tickets', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+        op.create_index('ix_tickets_title_trgm', 'tickets', ['title'], unique=False, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_users_name_trgm', 'users', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_users_email_trgm', 'users', ['email'], unique=False, postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_email_trgm', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_name_trgm', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_tickets_title_trgm', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('ix_tickets_search_vector', table_name='tickets', postgresql_concurrently=True)
+    op.drop_column('tickets', 'search_vector')
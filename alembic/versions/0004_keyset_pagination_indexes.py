@@ -0,0 +1,42 @@
+"""keyset pagination indexes
+
+Indexes matching the keyset order of the unfiltered listings
+(app/core/pagination.py), so every page is an index range scan:
+- tickets(created_at, id): admin ticket listing
+- users(created_at, id): user listing
+- ticket_transfers(requested_at, id): transfer request listing
+Per-user / per-agent ticket pages and message history already use the
+indexes of 0002.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:40:31.522904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tickets_created_at_id', 'tickets', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_ticket_transfers_requested_at_id', 'ticket_transfers', ['requested_at', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_ticket_transfers_requested_at_id', table_name='ticket_transfers', postgresql_concurrently=True)
+        op.drop_index('ix_users_created_at_id', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_tickets_created_at_id', table_name='tickets', postgresql_concurrently=True)
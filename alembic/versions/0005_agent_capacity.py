@@ -0,0 +1,45 @@
+"""agent capacity counters
+
+One row per agent holding its number of active (assigned / in_progress)
+tickets. Ticket assignment locks these rows, see app/operations/assignment.py.
+Backfilled from the tickets table.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 13:12:47.108236
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('agent_capacity',
+    sa.Column('agent_id', sa.Integer(), nullable=False),
+    sa.Column('active_tickets', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['agent_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('agent_id')
+    )
+    op.execute("""
+        INSERT INTO agent_capacity (agent_id, active_tickets)
+        SELECT users.id, count(tickets.id)
+        FROM users
+        LEFT JOIN tickets ON tickets.agent_id = users.id AND tickets.status IN ('assigned', 'in_progress')
+        WHERE users.role = 'agent'
+        GROUP BY users.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('agent_capacity')
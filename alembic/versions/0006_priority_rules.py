@@ -0,0 +1,53 @@
+"""priority rules
+
+Keyword -> priority rules read by app/core/priority_rules.py, seeded with the
+keywords that used to be hardcoded in _score_priority.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 14:03:52.640118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_RULES = {
+    'urgent': ['outage', 'critical', 'down', 'urgent', 'broken'],
+    'high': ['error', 'fail', 'slow', 'no internet'],
+    'low': ['question', 'inquiry', 'how to', 'request'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    priority_rules = op.create_table('priority_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('keyword', sa.String(length=100), nullable=False),
+    sa.Column('priority', postgresql.ENUM('low', 'medium', 'high', 'urgent', name='ticketpriority', create_type=False), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('keyword')
+    )
+    op.create_index(op.f('ix_priority_rules_id'), 'priority_rules', ['id'], unique=False)
+    op.bulk_insert(priority_rules, [
+        {'keyword': keyword, 'priority': priority}
+        for priority, keywords in DEFAULT_RULES.items()
+        for keyword in keywords
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_priority_rules_id'), table_name='priority_rules')
+    op.drop_table('priority_rules')
@@ -0,0 +1,47 @@
+"""ticket stats counters
+
+Ticket counts per (status, priority, category, agent) maintained by the ticket
+operations, read by the admin dashboard instead of COUNT(*) over tickets, see
+app/operations/ticket_stats.py. Backfilled from the tickets table.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 15:21:08.553912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ticket_stats',
+    sa.Column('status', postgresql.ENUM('open', 'assigned', 'in_progress', 'resolved', 'closed', 'reopened', 'requested_reopen', name='ticketstatus', create_type=False), nullable=False),
+    sa.Column('priority', postgresql.ENUM('low', 'medium', 'high', 'urgent', name='ticketpriority', create_type=False), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('agent_id', sa.Integer(), nullable=False),
+    sa.Column('tickets', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('status', 'priority', 'category_id', 'agent_id')
+    )
+    op.execute("""
+        INSERT INTO ticket_stats (status, priority, category_id, agent_id, tickets)
+        SELECT status, priority, category_id, coalesce(agent_id, 0), count(*)
+        FROM tickets
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('ticket_stats')
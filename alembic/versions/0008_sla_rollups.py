@@ -0,0 +1,87 @@
+"""sla rollups
+
+first_response_at / resolved_at on tickets and the sla_rollups histograms read
+by GET /admin/sla, see app/operations/sla.py. Backfilled from history:
+first_response_at from the first agent message; resolved_at of tickets already
+resolved / closed from closed_at, else updated_at (approximate).
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 16:02:41.270815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# app.operations.sla.bin_of in SQL
+BIN = "CASE WHEN {s} < 1 THEN 0 ELSE least(1 + floor(ln({s}) / ln(2) * 4), 127) END"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tickets', sa.Column('first_response_at', sa.TIMESTAMP(), nullable=True))
+    op.add_column('tickets', sa.Column('resolved_at', sa.TIMESTAMP(), nullable=True))
+    op.create_table('sla_rollups',
+    sa.Column('metric', sa.Enum('first_response', 'resolution', name='slametric'), nullable=False),
+    sa.Column('granularity', sa.Enum('hour', 'day', name='slagranularity'), nullable=False),
+    sa.Column('bucket_start', sa.TIMESTAMP(), nullable=False),
+    sa.Column('agent_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('bin', sa.SmallInteger(), nullable=False),
+    sa.Column('tickets', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('metric', 'granularity', 'bucket_start', 'agent_id', 'category_id', 'bin')
+    )
+
+    op.execute("""
+        WITH first_response AS (
+            SELECT DISTINCT ON (messages.ticket_id) messages.ticket_id, messages.timestamp, messages.sender_id
+            FROM messages JOIN users ON users.id = messages.sender_id
+            WHERE users.role = 'agent'
+            ORDER BY messages.ticket_id, messages.timestamp
+        )
+        UPDATE tickets SET first_response_at = first_response.timestamp
+        FROM first_response WHERE first_response.ticket_id = tickets.id
+    """)
+    op.execute("""
+        UPDATE tickets SET resolved_at = coalesce(closed_at, updated_at)
+        WHERE status IN ('resolved', 'closed')
+    """)
+
+    events = {
+        # metric: (event time, agent, the responding agent for first responses)
+        'first_response': ('tickets.first_response_at', """(
+            SELECT messages.sender_id FROM messages
+            WHERE messages.ticket_id = tickets.id AND messages.timestamp = tickets.first_response_at
+            ORDER BY messages.id LIMIT 1)"""),
+        'resolution': ('tickets.resolved_at', 'tickets.agent_id'),
+    }
+    for metric, (at, agent) in events.items():
+        seconds = f"greatest(extract(epoch FROM {at} - tickets.created_at), 0)"
+        for granularity in ('hour', 'day'):
+            op.execute(f"""
+                INSERT INTO sla_rollups (metric, granularity, bucket_start, agent_id, category_id, bin, tickets)
+                SELECT '{metric}'::slametric, '{granularity}'::slagranularity, date_trunc('{granularity}', {at}),
+                       coalesce({agent}, 0), tickets.category_id, {BIN.format(s=seconds)}, count(*)
+                FROM tickets
+                WHERE {at} IS NOT NULL
+                GROUP BY 1, 2, 3, 4, 5, 6
+            """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sla_rollups')
+    sa.Enum(name='slagranularity').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='slametric').drop(op.get_bind(), checkfirst=True)
+    op.drop_column('tickets', 'resolved_at')
+    op.drop_column('tickets', 'first_response_at')
@@ -0,0 +1,38 @@
+"""message history by id
+
+Chat history is read in id windows (before_id / after_id) and replayed on
+websocket resume by id: messages(ticket_id, id) replaces the
+messages(ticket_id, timestamp) index.
+
+Built CONCURRENTLY so a live database keeps taking writes.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 17:10:26.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_messages_ticket_id_id', 'messages', ['ticket_id', 'id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_messages_ticket_id_timestamp', table_name='messages', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_messages_ticket_id_timestamp', 'messages', ['ticket_id', 'timestamp'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_messages_ticket_id_id', table_name='messages', postgresql_concurrently=True)
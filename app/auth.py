@@ -1,27 +1,39 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db   # ✅ instead of SessionLocal
-from app.core.security import create_access_token, verify_password
+from app.core.password_pool import verify_and_update_password
+from app.core.security import create_access_token
 from app.models.user import User
 from fastapi.security import OAuth2PasswordRequestForm
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.post("/login")
-def login(
-    
+async def login(
+
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Use form_data.username as email
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = (await db.execute(select(User).filter(User.email == form_data.username))).scalars().first()
 
-    validationResult = verify_password(form_data.password, user.password_hash)
-    if not user or not validationResult:
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password"
+        )
+    # bcrypt runs on the password process pool, see app/core/password_pool.py
+    valid, new_hash = await verify_and_update_password(form_data.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made
+        user.password_hash = new_hash
+        await db.commit()
 
     access_token = create_access_token({"sub": str(user.id)})
     return {"access_token": access_token, "token_type": "bearer", "role":user.role}
@@ -0,0 +1,99 @@
+"""
+Measures the CPU a GET /tickets/ page costs to serialize, per request, with
+the ways FastAPI and this app can turn ORM rows into a JSON body. Needs no
+database: the rows are transient ORM objects shaped like a real page.
+
+FastAPI serializes a route with a response_model through that route's
+TypeAdapter, built once at import: validate_python(from_attributes) then
+dump_json straight to bytes in pydantic-core. Almost all of the time is the
+validation, and there mostly the fields with validators of their own (an
+EmailStr re-checks every embedded user's email); the JSON encoding that an
+orjson response class would replace is a small part, and such a class would
+switch FastAPI's dump_json path off.
+
+    python -m app.cli.bench_serialization --rows 100 --repeat 200
+"""
+
+import json
+import time
+from datetime import datetime
+from typing import Optional
+
+import click
+from fastapi.encoders import jsonable_encoder
+from pydantic import EmailStr, TypeAdapter
+
+from app.models.category import Category
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.models.user import User, UserRole
+from app.schemas.pagination import Page
+from app.schemas.ticket import TicketOut
+from app.schemas.user import UserOut
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _EmailStrUserOut(UserOut):
+    email: EmailStr
+
+
+class _EmailStrTicketOut(TicketOut):
+    user: _EmailStrUserOut
+    agent: Optional[_EmailStrUserOut] = None
+
+
+def _page(rows: int) -> dict:
+    category = Category(id=1, name="Network", description="Connectivity and outages")
+    agents = [User(id=1000 + i, name=f"Agent {i}", email=f"agent{i}@support.example.com", role=UserRole.agent)
+              for i in range(10)]
+    now = datetime.now()
+    tickets = [
+        Ticket(
+            id=i, ticket_uid=f"TICKET-{i:013d}", title=f"Fiber link down at site {i}",
+            initial_description="The uplink went down after the storm, customers report no service. " * 3,
+            status=TicketStatus.assigned, priority=TicketPriority.high, created_at=now, updated_at=now,
+            user=User(id=i, name=f"Customer {i}", email=f"customer{i}@example.com", role=UserRole.user),
+            agent=agents[i % len(agents)], category=category, subcategory=None,
+        )
+        for i in range(rows)
+    ]
+    return {"items": tickets, "next_cursor": "WzE3MDAwMDAwMDAsMTIzXQ"}
+
+
+def _timed(repeat: int, fn) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat * 1000
+
+
+@click.command()
+@click.option("--rows", default=100, show_default=True, help="tickets per page")
+@click.option("--repeat", default=200, show_default=True, help="serializations per measurement")
+def bench_serialization(rows: int, repeat: int):
+    page = _page(rows)
+    adapter = TypeAdapter(Page[TicketOut])
+    email_str_adapter = TypeAdapter(Page[_EmailStrTicketOut])
+    validated = adapter.validate_python(page, from_attributes=True)
+
+    results = [
+        ("validate, EmailStr users (before)", _timed(repeat, lambda: email_str_adapter.validate_python(page, from_attributes=True))),
+        ("validate, str users", _timed(repeat, lambda: adapter.validate_python(page, from_attributes=True))),
+        ("encode: dump_json (FastAPI response_model)", _timed(repeat, lambda: adapter.dump_json(validated))),
+        ("encode: dump_python + json.dumps", _timed(repeat, lambda: json.dumps(adapter.dump_python(validated, mode="json")).encode())),
+    ]
+    if orjson is not None:
+        results.append(("encode: dump_python + orjson", _timed(repeat, lambda: orjson.dumps(adapter.dump_python(validated, mode="json")))))
+    results.append(("encode: jsonable_encoder + json.dumps", _timed(max(repeat // 10, 1), lambda: json.dumps(jsonable_encoder(validated)).encode())))
+
+    print(f"CPU per page of {rows} tickets")
+    for name, ms in results:
+        print(f"  {name:45s} {ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    bench_serialization()
@@ -0,0 +1,58 @@
+"""
+Bulk ticket import from a file, same rules as POST /admin/tickets/import.
+
+    python -m app.cli.import_tickets tickets.jsonl --as-email admin@example.com
+    python -m app.cli.import_tickets backlog.csv --format csv --as-email admin@example.com
+"""
+
+import asyncio
+import sys
+
+import click
+from sqlalchemy import select
+
+from app.core.agent_load import rebuild_agent_load_index
+from app.core.ticket_uid import ticket_uid_generator
+from app.database import AsyncSessionLocal, async_engine
+from app.models.user import User
+from app.operations.bulk_import import FORMATS, import_tickets as run_import
+
+
+async def _import(data: str, format: str, as_email: str):
+    # a worker id of its own, so the uids cannot collide with a running app
+    await ticket_uid_generator.claim_worker_id(async_engine)
+    try:
+        await rebuild_agent_load_index()
+        async with AsyncSessionLocal() as db:
+            user_id = (await db.execute(select(User.id).filter(User.email == as_email))).scalar()
+            if user_id is None:
+                return None
+            return await run_import(db, data, format, user_id)
+    finally:
+        await ticket_uid_generator.release()
+        await async_engine.dispose()
+
+
+@click.command()
+@click.argument("path", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--format", "format", type=click.Choice(FORMATS), default=None, help="default: from the file extension")
+@click.option("--as-email", required=True, help="creator of rows without user_id / user_email")
+def import_tickets(path, format, as_email):
+    if format is None:
+        format = "csv" if path.name.lower().endswith(".csv") else "jsonl"
+    result = asyncio.run(_import(path.read(), format, as_email))
+    if result is None:
+        sys.exit(f"no user with email {as_email}")
+    print(f"{result['imported']}/{result['received']} tickets imported, {result['failed']} failed")
+    for priority, count in sorted(result["by_priority"].items()):
+        print(f"  {priority}: {count}")
+    for error in result["errors"]:
+        print(f"  line {error['row']}: {error['error']}")
+    if result["errors_truncated"]:
+        print(f"  ... first {len(result['errors'])} errors shown")
+    if result["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    import_tickets()
@@ -0,0 +1,32 @@
+"""
+Recounts tickets and corrects the dashboard counters (ticket_stats) that
+drifted, same as POST /admin/dashboard/reconcile. Safe to run from cron while
+the app serves traffic: ticket writes wait for it, dashboard reads do not.
+
+    python -m app.cli.reconcile_ticket_stats
+"""
+
+import asyncio
+
+import click
+
+from app.database import AsyncSessionLocal, async_engine
+from app.operations.ticket_stats import reconcile
+
+
+async def _reconcile():
+    try:
+        async with AsyncSessionLocal() as db:
+            return await reconcile(db)
+    finally:
+        await async_engine.dispose()
+
+
+@click.command()
+def reconcile_ticket_stats():
+    result = asyncio.run(_reconcile())
+    print(f"{result['tickets']} tickets counted, {result['corrected_rows']} counter rows corrected (drift {result['drift']})")
+
+
+if __name__ == "__main__":
+    reconcile_ticket_stats()
@@ -0,0 +1,183 @@
+"""
+Concurrency stress test of ticket assignment (app/operations/assignment.py).
+
+Fires --tickets create_ticket calls at one category, --concurrency at a time in
+each of --processes worker processes (each process stands in for a uvicorn
+worker), then checks that:
+- the load was spread as assigning the tickets one by one would: every agent
+  of the category ends within 1 of the water-filled ideal, i.e. the loads of
+  giving each ticket in turn to the least loaded agent, starting from the
+  loads before the run
+- agent_capacity still equals the number of active tickets of every agent
+
+--rounds repeats the run, each round from the loads the previous one left
+(with --keep) or the original ones; interleavings differ between rounds, so
+more rounds make a lucky pass less likely. The created tickets are deleted
+after each round and the counters restored, unless --keep. Meant for a staging
+database, not one serving traffic.
+
+    python -m app.cli.stress_assignment --category-id 1 --tickets 500 --processes 4 --rounds 5
+"""
+
+import asyncio
+import heapq
+import multiprocessing
+import sys
+import uuid
+from collections import Counter
+
+import click
+from sqlalchemy import delete, func, select
+
+from app.core.agent_load import ACTIVE_STATUSES, agent_load_index, rebuild_agent_load_index
+from app.core.ticket_uid import ticket_uid_generator
+from app.database import AsyncSessionLocal, async_engine
+from app.models.agent_capacity import AgentCapacity
+from app.models.ticket import Ticket
+from app.models.user import User, UserRole
+from app.operations import ticket as ticket_ops
+from app.operations.assignment import adjust_loads
+from app.schemas.ticket import TicketCreate
+
+
+async def _create_tickets(category_id: int, user_id: int, tag: str, count: int, concurrency: int):
+    # a worker id of its own, as each app worker has: the uids cannot collide
+    await ticket_uid_generator.claim_worker_id(async_engine)
+    try:
+        await rebuild_agent_load_index()
+        slots = asyncio.Semaphore(concurrency)
+
+        async def create(i: int):
+            async with slots, AsyncSessionLocal() as db:
+                ticket = TicketCreate(title=f"{tag} #{i}", initial_description="stress test", category_id=category_id)
+                await ticket_ops.create_ticket(db, ticket, user_id)
+
+        await asyncio.gather(*(create(i) for i in range(count)))
+    finally:
+        await ticket_uid_generator.release()
+
+
+def _run(coro_fn, *args):
+    """asyncio.run, disposing the pool: its connections belong to the loop that is closing."""
+    async def main():
+        try:
+            return await coro_fn(*args)
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(main())
+
+
+def _worker(category_id: int, user_id: int, tag: str, count: int, concurrency: int):
+    _run(_create_tickets, category_id, user_id, tag, count, concurrency)
+
+
+async def _loads(agent_ids: set[int]) -> dict[int, int]:
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(AgentCapacity.agent_id, AgentCapacity.active_tickets).filter(AgentCapacity.agent_id.in_(agent_ids))
+        )).all()
+    return dict(rows)
+
+
+async def _actual_loads(agent_ids: set[int]) -> dict[int, int]:
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(Ticket.agent_id, func.count(Ticket.id))
+            .filter(Ticket.agent_id.in_(agent_ids), Ticket.status.in_(ACTIVE_STATUSES))
+            .group_by(Ticket.agent_id)
+        )).all()
+    return {agent_id: dict(rows).get(agent_id, 0) for agent_id in agent_ids}
+
+
+async def _created(tag: str) -> Counter:
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(select(Ticket.agent_id).filter(Ticket.title.like(f"{tag} #%")))).scalars().all()
+    return Counter(rows)
+
+
+async def _cleanup(tag: str, created: Counter):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Ticket).filter(Ticket.title.like(f"{tag} #%")))
+        deltas = {agent_id: -count for agent_id, count in created.items() if agent_id is not None}
+        await adjust_loads(db, deltas)
+        await db.commit()
+
+
+async def _prepare(category_id: int):
+    await rebuild_agent_load_index()
+    agent_ids = agent_load_index.agents_in(category_id)
+    async with AsyncSessionLocal() as db:
+        user_id = (await db.execute(
+            select(User.id).filter(User.role == UserRole.user).order_by(User.id).limit(1)
+        )).scalar()
+    return agent_ids, user_id
+
+
+def _water_filled(loads: dict[int, int], tickets: int) -> dict[int, int]:
+    """The loads after giving each ticket in turn to the least loaded agent."""
+    heap = [(load, agent_id) for agent_id, load in loads.items()]
+    heapq.heapify(heap)
+    for _ in range(tickets if heap else 0):
+        load, agent_id = heapq.heappop(heap)
+        heapq.heappush(heap, (load + 1, agent_id))
+    return {agent_id: load for load, agent_id in heap}
+
+
+def _round(category_id, agent_ids, user_id, tickets, concurrency, processes, keep) -> bool:
+    before = _run(_loads, agent_ids)
+    tag = f"stress-{uuid.uuid4().hex[:8]}"
+    per_process = [tickets // processes + (1 if i < tickets % processes else 0) for i in range(processes)]
+    ctx = multiprocessing.get_context("spawn")
+    workers = [
+        ctx.Process(target=_worker, args=(category_id, user_id, tag, count, concurrency))
+        for count in per_process if count
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    async def report():
+        return await _created(tag), await _loads(agent_ids), await _actual_loads(agent_ids)
+
+    created, after, actual = _run(report)
+    print(f"{sum(created.values())}/{tickets} tickets created, {processes} processes x {concurrency} concurrent")
+    ideal = _water_filled(before, sum(created.values()))
+    for agent_id in sorted(agent_ids):
+        print(f"  agent {agent_id}: +{created.get(agent_id, 0)} (active {before.get(agent_id, 0)} -> "
+              f"{after.get(agent_id, 0)}, ideal {ideal.get(agent_id, 0)})")
+    level = all(abs(after.get(agent_id, 0) - ideal.get(agent_id, 0)) <= 1 for agent_id in agent_ids)
+    consistent = after == actual
+    print(f"every agent within 1 of the water-filled ideal: {'ok' if level else 'FAILED'}")
+    print(f"agent_capacity matches active tickets: {'ok' if consistent else 'FAILED'}")
+
+    if not keep:
+        _run(_cleanup, tag, created)
+    return level and consistent and sum(created.values()) == tickets
+
+
+@click.command()
+@click.option("--category-id", type=int, required=True)
+@click.option("--tickets", type=int, default=300, show_default=True)
+@click.option("--concurrency", type=int, default=50, show_default=True, help="in-flight creates per process")
+@click.option("--processes", type=int, default=2, show_default=True, help="simulated app workers")
+@click.option("--rounds", type=int, default=1, show_default=True, help="runs, each checked on its own")
+@click.option("--keep", is_flag=True, help="keep the created tickets")
+def stress_assignment(category_id, tickets, concurrency, processes, rounds, keep):
+    agent_ids, user_id = _run(_prepare, category_id)
+    if not agent_ids:
+        sys.exit(f"category {category_id} has no agents")
+    if user_id is None:
+        sys.exit("no user to create the tickets as")
+
+    failed = 0
+    for i in range(rounds):
+        if rounds > 1:
+            print(f"round {i + 1}/{rounds}")
+        failed += not _round(category_id, agent_ids, user_id, tickets, concurrency, processes, keep)
+    if failed:
+        sys.exit(f"{failed}/{rounds} rounds failed")
+
+
+if __name__ == "__main__":
+    stress_assignment()
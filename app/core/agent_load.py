@@ -0,0 +1,95 @@
+"""
+In-memory view of agent category membership and active ticket counts.
+
+Assignment itself is decided by the locked agent_capacity counters
+(app/operations/assignment.py), which stay correct across workers; this index
+only spares it the membership query and mirrors the counters it returns.
+
+The index is rebuilt from the database at startup and every
+AGENT_LOAD_RESYNC_SECONDS, which also picks up category assignments edited in
+the database and counts changed by other workers.
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import settings
+from app.database import AsyncSessionLocal
+from app.models.agent_capacity import AgentCapacity
+from app.models.agent_category_assignment import AgentCategoryAssignment
+from app.models.ticket import TicketStatus
+from app.models.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = frozenset({TicketStatus.assigned, TicketStatus.in_progress})
+
+
+class AgentLoadIndex:
+    def __init__(self):
+        self._load: dict[int, int] = {}
+        self._agent_categories: dict[int, set[int]] = {}
+        self._category_agents: dict[int, set[int]] = {}
+
+    async def rebuild(self, db: AsyncSession):
+        """Replaces the whole index with the current database state."""
+        # agents created outside the API (CLI, seeding) get their counter row here
+        await db.execute(
+            pg_insert(AgentCapacity)
+            .from_select(["agent_id"], select(User.id).filter(User.role == UserRole.agent))
+            .on_conflict_do_nothing()
+        )
+        await db.commit()
+        memberships = (await db.execute(
+            select(AgentCategoryAssignment.agent_id, AgentCategoryAssignment.category_id)
+            .join(User, User.id == AgentCategoryAssignment.agent_id)
+            .filter(User.role == UserRole.agent)
+        )).all()
+        load = dict((await db.execute(select(AgentCapacity.agent_id, AgentCapacity.active_tickets))).all())
+        agent_categories: dict[int, set[int]] = {}
+        category_agents: dict[int, set[int]] = {}
+        for agent_id, category_id in memberships:
+            agent_categories.setdefault(agent_id, set()).add(category_id)
+            category_agents.setdefault(category_id, set()).add(agent_id)
+
+        # swapped in without awaiting, so a request never sees half an index
+        self._load = load
+        self._agent_categories = agent_categories
+        self._category_agents = category_agents
+
+    def load_of(self, agent_id: int) -> int:
+        return self._load.get(agent_id, 0)
+
+    def agents_in(self, category_id: int) -> set[int]:
+        return set(self._category_agents.get(category_id, ()))
+
+    def set_loads(self, loads: dict[int, int]):
+        """Mirrors committed agent_capacity values."""
+        self._load.update(loads)
+
+    def remove_agent(self, agent_id: int):
+        self._load.pop(agent_id, None)
+        for category_id in self._agent_categories.pop(agent_id, ()):
+            self._category_agents[category_id].discard(agent_id)
+
+
+agent_load_index = AgentLoadIndex()
+
+
+async def rebuild_agent_load_index():
+    async with AsyncSessionLocal() as db:
+        await agent_load_index.rebuild(db)
+
+
+async def resync_agent_load_forever():
+    """Background task: periodically replaces the index with the database truth."""
+    while True:
+        await asyncio.sleep(settings.AGENT_LOAD_RESYNC_SECONDS)
+        try:
+            await rebuild_agent_load_index()
+        except Exception:
+            logger.exception("agent load index resync failed")
@@ -0,0 +1,105 @@
+"""
+In-process cache of the category / subcategory tree.
+
+The tree is tiny and almost never changes (see seed_category.py), so the
+category endpoints and ticket-creation validation read it from memory. The
+write operations in app/operations/category.py invalidate it after commit;
+changes made by another worker are picked up after CATEGORY_CACHE_TTL_SECONDS.
+Reloads read the primary, so a lagging replica is never cached right after a write.
+
+`version` is a digest of the tree content, so every worker holding the same
+tree reports the same version (usable as an ETag).
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.core import settings
+from app.database import AsyncSessionLocal
+from app.models.category import Category
+
+
+@dataclass(frozen=True, slots=True)
+class SubcategoryNode:
+    id: int
+    category_id: int
+    name: str
+    description: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryNode:
+    id: int
+    name: str
+    description: str | None
+    subcategories: tuple[SubcategoryNode, ...]
+
+    def has_subcategory(self, subcategory_id: int) -> bool:
+        return any(sub.id == subcategory_id for sub in self.subcategories)
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryTree:
+    version: str
+    categories: tuple[CategoryNode, ...]
+    by_id: dict[int, CategoryNode]
+
+
+class CategoryCache:
+    def __init__(self, ttl_seconds: float):
+        self._ttl_seconds = ttl_seconds
+        self._tree: CategoryTree | None = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> CategoryTree:
+        tree = self._tree
+        if tree is not None and time.monotonic() < self._expires_at:
+            return tree
+        async with self._lock:
+            # another request may have reloaded while we waited
+            if self._tree is not None and time.monotonic() < self._expires_at:
+                return self._tree
+            generation = self._generation
+            tree = await self._load()
+            # an invalidation during the load means the tree read may already be stale
+            if generation == self._generation:
+                self._tree = tree
+                self._expires_at = time.monotonic() + self._ttl_seconds
+            return tree
+
+    def invalidate(self):
+        """Called after every committed category / subcategory write."""
+        self._generation += 1
+        self._tree = None
+
+    @staticmethod
+    async def _load() -> CategoryTree:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(Category).options(selectinload(Category.subcategories)).order_by(Category.id)
+            )).scalars().all()
+        categories = tuple(
+            CategoryNode(
+                id=category.id,
+                name=category.name,
+                description=category.description,
+                subcategories=tuple(
+                    SubcategoryNode(id=sub.id, category_id=sub.category_id, name=sub.name, description=sub.description)
+                    for sub in sorted(category.subcategories, key=lambda sub: sub.id)
+                ),
+            )
+            for category in rows
+        )
+        digest = hashlib.sha1(json.dumps([asdict(c) for c in categories], sort_keys=True).encode()).hexdigest()[:16]
+        return CategoryTree(version=digest, categories=categories, by_id={c.id: c for c in categories})
+
+
+category_cache = CategoryCache(ttl_seconds=settings.CATEGORY_CACHE_TTL_SECONDS)
@@ -0,0 +1,211 @@
+"""
+Cross-worker chat delivery over Postgres LISTEN / NOTIFY.
+
+The creator and the agent of a ticket are usually connected to different
+uvicorn workers (or hosts), so a room (app/core/connection_manager.py) only
+holds the connections of one process. Messages therefore go through Postgres:
+- pg_notify on the ticket's channel is issued inside the transaction that
+  inserts the message (publish(), or app/core/message_writer.py per batch),
+  so the notification is sent on commit, exactly once, and never for a
+  rolled back message
+- each worker holds one listener connection and LISTENs on the channels of the
+  tickets it has local connections for (LISTEN on a room's first join,
+  UNLISTEN when it empties), then broadcasts what arrives to the local room
+Every delivery, the sender's own worker included, comes through the listener.
+
+NOTIFY payloads are capped at 8000 bytes: a larger message is published as a
+reference to its row, and each listening worker reads it back once for all its
+connections. Notifications are handled in arrival order, reads included, so a
+room sees a ticket's messages in commit order.
+
+If the listener connection drops, it reconnects with backoff and LISTENs again;
+messages committed in between are not delivered live (clients reconnect with
+their last message id and the endpoint replays them).
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.core.connection_manager import Connection, connection_manager
+from app.core.message_cache import message_cache
+from app.database import AsyncSessionLocal
+from app.models.message import Message
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "ticket_chat_"
+MAX_PAYLOAD_BYTES = 7900  # Postgres rejects NOTIFY payloads of 8000 bytes and more
+_INLINE, _REFERENCE = "m", "r"  # payload kinds: the client payload itself, or a message id
+_MAX_RECONNECT_SECONDS = 30
+_KEEPALIVE_SECONDS = 30
+
+
+def channel(ticket_id: int) -> str:
+    return f"{CHANNEL_PREFIX}{ticket_id}"
+
+
+def message_payload(message_id: int, ticket_id: int, content: str, sender_id: int, sender_name: str,
+                    timestamp: datetime) -> dict:
+    """What the chat clients receive for one message; the timestamp in ISO 8601, as in MessageOut."""
+    return {
+        "id": message_id,
+        "ticket_id": ticket_id,
+        "message": content,
+        "sender_name": sender_name,
+        "sender_id": sender_id,
+        "timestamp": timestamp.isoformat(),
+    }
+
+
+def notify_body(payload: dict) -> str:
+    """The NOTIFY payload of a message: itself, or its id when too large."""
+    body = json.dumps(payload)
+    if len(body.encode()) + 1 > MAX_PAYLOAD_BYTES:
+        return _REFERENCE + str(payload["id"])
+    return _INLINE + body
+
+
+async def publish(db: AsyncSession, ticket_id: int, payload: dict):
+    """Queues payload for every worker with a connection on the ticket; sent when db commits."""
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"), {"channel": channel(ticket_id), "payload": notify_body(payload)}
+    )
+
+
+async def _load_payload(message_id: int) -> dict | None:
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(Message.id, Message.ticket_id, Message.content, Message.sender_id, User.name, Message.timestamp)
+            .join(User, User.id == Message.sender_id)
+            .filter(Message.id == message_id)
+        )).first()
+    return message_payload(*row) if row else None
+
+
+class ChatBus:
+    def __init__(self):
+        self._engine: AsyncEngine | None = None
+        self._connection: AsyncConnection | None = None
+        self._driver = None  # the asyncpg connection under _connection
+        self._channels: set[int] = set()  # tickets this worker LISTENs to
+        self._lock = asyncio.Lock()  # one command at a time on the listener connection
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self, engine: AsyncEngine):
+        self._engine = engine
+        self._tasks = [asyncio.create_task(self._listen_forever()), asyncio.create_task(self._dispatch_forever())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._close_connection()
+
+    async def join(self, websocket, ticket_id: int, user_id: int, paused: bool = False) -> Connection:
+        """Adds an accepted websocket to the ticket's room, listening to the ticket if it is the first.
+
+        Once it returns, every message committed from then on reaches the connection."""
+        connection = connection_manager.connect(websocket, ticket_id, user_id, paused)
+        async with self._lock:
+            if ticket_id not in self._channels:
+                self._channels.add(ticket_id)
+                await self._listen(ticket_id, True)
+        return connection
+
+    async def leave(self, connection: Connection):
+        await connection_manager.disconnect(connection)
+        ticket_id = connection.ticket_id
+        async with self._lock:
+            if ticket_id in self._channels and not connection_manager.room_size(ticket_id):
+                self._channels.discard(ticket_id)
+                message_cache.drop(ticket_id)  # its deliveries stop
+                await self._listen(ticket_id, False)
+
+    def listening(self, ticket_id: int) -> bool:
+        """Whether every message committed on the ticket now reaches this worker."""
+        return ticket_id in self._channels and self._driver is not None
+
+    async def _listen(self, ticket_id: int, listen: bool):
+        """LISTEN / UNLISTEN, unless disconnected: _connect replays the channels."""
+        if self._driver is None:
+            return
+        try:
+            if listen:
+                await self._driver.add_listener(channel(ticket_id), self._on_notification)
+            else:
+                await self._driver.remove_listener(channel(ticket_id), self._on_notification)
+        except Exception:
+            logger.exception("chat bus %s of ticket %s failed", "LISTEN" if listen else "UNLISTEN", ticket_id)
+
+    def _on_notification(self, driver, pid, channel_name, payload):
+        self._inbox.put_nowait((int(channel_name.removeprefix(CHANNEL_PREFIX)), payload))
+
+    async def _dispatch_forever(self):
+        while True:
+            ticket_id, payload = await self._inbox.get()
+            try:
+                if payload.startswith(_REFERENCE):
+                    loaded = await _load_payload(int(payload[1:]))
+                    if loaded is not None:
+                        connection_manager.broadcast(ticket_id, loaded)
+                        message_cache.add(ticket_id, loaded)
+                else:
+                    connection_manager.broadcast_text(ticket_id, payload[1:])
+                    if message_cache.wants(ticket_id):
+                        message_cache.add(ticket_id, json.loads(payload[1:]))
+            except Exception:
+                logger.exception("chat bus delivery failed for ticket %s", ticket_id)
+
+    async def _connect(self):
+        connection = await self._engine.connect()
+        await connection.commit()  # autobegin: LISTEN must not sit in an open transaction
+        driver = (await connection.get_raw_connection()).driver_connection
+        lost = asyncio.get_running_loop().create_future()
+        driver.add_termination_listener(lambda _: lost.done() or lost.set_result(None))
+        async with self._lock:
+            self._connection, self._driver = connection, driver
+            for ticket_id in self._channels:
+                await driver.add_listener(channel(ticket_id), self._on_notification)
+        return lost
+
+    async def _close_connection(self):
+        connection, self._connection, self._driver = self._connection, None, None
+        message_cache.clear()  # deliveries are missed until reconnected
+        if connection is not None:
+            try:
+                # invalidate, not close: a pooled connection would keep listening
+                await connection.invalidate()
+            except Exception:
+                pass
+
+    async def _listen_forever(self):
+        delay = 1
+        while True:
+            try:
+                lost = await self._connect()
+                delay = 1
+                while not lost.done():
+                    # a dead network only shows when something is sent
+                    await asyncio.wait([lost], timeout=_KEEPALIVE_SECONDS)
+                    if not lost.done():
+                        async with self._lock:
+                            await asyncio.wait_for(self._driver.execute("SELECT 1"), _KEEPALIVE_SECONDS)
+                logger.warning("chat bus listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("chat bus listener failed, retrying in %ss", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_SECONDS)
+            await self._close_connection()
+
+
+chat_bus = ChatBus()
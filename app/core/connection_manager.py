@@ -0,0 +1,185 @@
+"""
+Live chat rooms: the open websockets of each ticket.
+
+Every websocket of a ticket (its creator, the agent, admins watching) joins the
+ticket's room; a persisted message is broadcast once to the room and each
+participant receives it live, instead of polling GET /messages/{ticket_id}.
+
+A broadcast never waits on a client. Each connection has a bounded send queue
+drained by its own task; the payload is serialized once per broadcast and put
+on every queue without blocking. A client that falls WS_SEND_QUEUE_SIZE
+messages behind (stalled network, suspended tab) is disconnected with 1013
+"try again later": it reconnects and resumes from its last message, while the rest of
+the room is unaffected and memory stays bounded.
+
+A send that takes longer than WS_SEND_TIMEOUT_SECONDS (the peer stopped
+reading, the TCP window is full) gives up on the connection too; it is checked
+by receive() on each frame and heartbeat tick, not with a timer per send.
+
+Heartbeats are application frames, so they work through proxies that hide
+protocol pings: receive() sends {"type": "ping"} after WS_PING_INTERVAL_SECONDS
+without a frame from the client, and gives up on a client silent for
+WS_IDLE_TIMEOUT_SECONDS (closed with 1001). Any frame, {"type": "pong"}
+included, counts as a sign of life. A connection holds no database session
+between frames, so a worker can keep many idle sockets open.
+
+A reconnecting client can join paused: live messages queue up while the
+endpoint replays what it missed straight to the socket, then resume() drops
+the queued ones the replay already covered and starts the sender.
+
+Rooms are per worker process; app/core/chat_bus.py carries messages between
+workers and feeds the rooms.
+"""
+
+import asyncio
+import json
+
+from fastapi import WebSocket
+
+from app.core import settings
+
+OVERFLOW_CLOSE_CODE = 1013  # try again later
+IDLE_CLOSE_CODE = 1001  # going away
+PING = json.dumps({"type": "ping"})
+_CLOSE = object()  # queue sentinel: close the websocket and stop
+
+
+class Connection:
+    __slots__ = ("websocket", "ticket_id", "user_id", "closing", "_close_code", "_queue", "_resumed", "_sending_since", "_sender")
+
+    def __init__(self, websocket: WebSocket, ticket_id: int, user_id: int, queue_size: int, paused: bool = False):
+        self.websocket = websocket
+        self.ticket_id = ticket_id
+        self.user_id = user_id
+        self.closing = False  # being closed by the server: receive() returns None
+        self._close_code = OVERFLOW_CLOSE_CODE
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size + 1)  # +1: room for _CLOSE
+        self._resumed = asyncio.Event()
+        if not paused:
+            self._resumed.set()
+        self._sending_since: float | None = None  # loop time the send in progress started
+        self._sender = asyncio.create_task(self._send_forever())
+
+    def send(self, text: str) -> bool:
+        """Queues text for this client; False when it was too far behind and is being closed."""
+        if self.closing:
+            return False
+        if self._queue.qsize() >= self._queue.maxsize - 1:
+            self._overflow()
+            return False
+        self._queue.put_nowait(text)
+        return True
+
+    def resume(self, sent_ids: set[int] = frozenset()):
+        """Starts sending a paused connection's queue, minus the messages of sent_ids."""
+        if sent_ids and not self.closing:
+            queued = [self._queue.get_nowait() for _ in range(self._queue.qsize())]
+            for text in queued:
+                if json.loads(text).get("id") not in sent_ids:
+                    self._queue.put_nowait(text)
+        self._resumed.set()
+
+    def _overflow(self):
+        # drop the backlog: the client resumes from its last message id when it reconnects
+        self._close(OVERFLOW_CLOSE_CODE)
+
+    async def receive(self) -> str | None:
+        """
+        The next text frame from the client, pinging it while it is quiet; None
+        once the connection is being closed (silent client, overflow, stalled
+        sends). Raises WebSocketDisconnect when the client leaves.
+        """
+        idle = 0.0
+        while not self.closing:
+            if self._stalled():
+                # the client stopped reading: its send will not finish
+                self.closing = True
+                self._sender.cancel()
+                break
+            try:
+                return await asyncio.wait_for(self.websocket.receive_text(), settings.WS_PING_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                idle += settings.WS_PING_INTERVAL_SECONDS
+            if idle >= settings.WS_IDLE_TIMEOUT_SECONDS:
+                self._close(IDLE_CLOSE_CODE)
+            else:
+                self.send(PING)
+        return None
+
+    def _stalled(self) -> bool:
+        since = self._sending_since
+        return since is not None and asyncio.get_running_loop().time() - since > settings.WS_SEND_TIMEOUT_SECONDS
+
+    def _close(self, code: int):
+        if not self.closing:
+            self.closing = True
+            self._close_code = code
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(_CLOSE)
+        self._resumed.set()
+
+    async def _send_forever(self):
+        loop = asyncio.get_running_loop()
+        try:
+            await self._resumed.wait()
+            while True:
+                text = await self._queue.get()
+                self._sending_since = loop.time()
+                if text is _CLOSE:
+                    await self.websocket.close(code=self._close_code)
+                    return
+                await self.websocket.send_text(text)
+                self._sending_since = None
+        except Exception:
+            # the client went away; the endpoint's receive loop notices and leaves the room
+            return
+
+    async def close(self):
+        """Stops the sender; queued messages are not sent, a pending close frame is."""
+        if self.closing:
+            await asyncio.wait([self._sender], timeout=settings.WS_SEND_TIMEOUT_SECONDS)
+        self._sender.cancel()
+        try:
+            await self._sender
+        except asyncio.CancelledError:
+            pass
+
+
+class ConnectionManager:
+    def __init__(self, queue_size: int):
+        self._queue_size = queue_size
+        self._rooms: dict[int, set[Connection]] = {}
+
+    def connect(self, websocket: WebSocket, ticket_id: int, user_id: int, paused: bool = False) -> Connection:
+        """Joins an accepted websocket to the ticket's room (paused: queue only, until resume())."""
+        connection = Connection(websocket, ticket_id, user_id, self._queue_size, paused)
+        self._rooms.setdefault(ticket_id, set()).add(connection)
+        return connection
+
+    async def disconnect(self, connection: Connection):
+        room = self._rooms.get(connection.ticket_id)
+        if room is not None:
+            room.discard(connection)
+            if not room:
+                del self._rooms[connection.ticket_id]
+        await connection.close()
+
+    def broadcast(self, ticket_id: int, payload: dict) -> int:
+        """Queues payload for everyone in the ticket's room: the number of connections reached."""
+        if ticket_id not in self._rooms:
+            return 0
+        return self.broadcast_text(ticket_id, json.dumps(payload, default=str))
+
+    def broadcast_text(self, ticket_id: int, text: str) -> int:
+        """broadcast() of an already serialized payload."""
+        room = self._rooms.get(ticket_id)
+        if not room:
+            return 0
+        return sum(connection.send(text) for connection in tuple(room))
+
+    def room_size(self, ticket_id: int) -> int:
+        return len(self._rooms.get(ticket_id, ()))
+
+
+connection_manager = ConnectionManager(queue_size=settings.WS_SEND_QUEUE_SIZE)
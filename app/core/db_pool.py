@@ -0,0 +1,79 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class _PoolCounters:
+    """Checkout counters shared by the instrumented pools."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0  # checkouts that found no idle connection
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, had_idle: bool, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if not had_idle:
+                self.waits += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout: queue wait plus connect time when the pool has to open one."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counters = _PoolCounters()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.counters = self.counters
+        return pool
+
+    def _do_get(self):
+        had_idle = self.checkedin() > 0
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.counters.record(time.perf_counter() - started, had_idle, timed_out=True)
+            raise
+        self.counters.record(time.perf_counter() - started, had_idle)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncPool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(pool) -> dict:
+    """Live snapshot of a pool, used by the admin pool endpoint."""
+    counters = pool.counters
+    waits = counters.waits
+    return {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "checkouts": counters.checkouts,
+        "waits": waits,
+        "timeouts": counters.timeouts,
+        "wait_ms_total": round(counters.wait_seconds_total * 1000, 3),
+        "wait_ms_avg": round(counters.wait_seconds_total * 1000 / waits, 3) if waits else 0.0,
+        "wait_ms_max": round(counters.wait_seconds_max * 1000, 3),
+    }
@@ -0,0 +1,53 @@
+"""
+Weak ETags and conditional GETs.
+
+A polled resource gets an ETag computed from something much cheaper than its
+body: the category cache version, a row's updated_at, or count(*) and the sum
+of hashes of (id, updated_at) of the rows a listing is drawn from. Rows that a
+representation embeds count too: a ticket's tag covers its creator's and
+agent's updated_at. A client sending it back in If-None-Match gets 304 Not
+Modified and no body; the rows are neither loaded nor serialized.
+
+updated_at is the start time of the transaction that wrote it, so a listing
+is not versioned by max(updated_at): an update committed after a later-started
+one would leave the maximum where it was. The hash sum moves with any row's
+updated_at, whichever order the writes commit in.
+
+The tags are weak (W/"..."): they say the representation is equivalent, not
+byte-identical. They are computed before the body is read, so a change that
+lands in between makes the client download once more, never keep stale data.
+"""
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+
+def weak_etag(*parts) -> str:
+    digest = hashlib.sha1("\x1f".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak comparison: W/"x" and "x" match
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def conditional(request: Request, response: Response, etag: str, private: bool = True) -> Response | None:
+    """
+    The 304 answer when the client already has `etag`; otherwise None, with
+    the ETag set on `response` for the full answer. Private: the resource
+    depends on the caller, shared caches must not keep it.
+    """
+    cache_control = "private, no-cache" if private else "no-cache"
+    if _matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": cache_control})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return None
@@ -0,0 +1,182 @@
+"""
+Per-worker cache of the latest messages of the active tickets.
+
+Agents reopen the same open conversations all day; each open reads the latest
+history window of the ticket. While this worker has a websocket on a ticket it
+LISTENs to the ticket's chat channel (app/core/chat_bus.py) and so sees every
+message committed on it, from any worker, in commit order. That is what keeps
+an entry exact:
+- the first history read of a listened ticket fills the entry from the primary
+  (MESSAGE_CACHE_PER_TICKET latest messages); messages delivered during that
+  read are collected and merged in, so none is lost between query and fill
+- each message the chat bus delivers is added to the entry; the oldest fall
+  off past MESSAGE_CACHE_PER_TICKET
+- when the worker stops listening to the ticket (its last websocket left) or
+  the listener connection drops (deliveries may have been missed), the entry
+  is dropped
+An entry holds every message with an id from its oldest one on, or the whole
+history when the ticket has fewer messages: windows inside that range are
+served without a query, others go to the database.
+
+Entries are evicted least recently used first once their estimated size goes
+over MESSAGE_CACHE_MAX_BYTES. Only touched from the event loop, so no locking.
+"""
+
+import bisect
+import sys
+from collections import OrderedDict
+from datetime import datetime
+
+from app.core import settings
+
+_MESSAGE_OVERHEAD = 250  # bytes of a cached message besides its strings (object, ints, datetime, list slot)
+
+
+class CachedMessage:
+    __slots__ = ("id", "ticket_id", "sender_id", "sender_name", "content", "timestamp")
+
+    def __init__(self, id: int, ticket_id: int, sender_id: int, sender_name: str, content: str, timestamp: datetime):
+        self.id = id
+        self.ticket_id = ticket_id
+        self.sender_id = sender_id
+        self.sender_name = sender_name
+        self.content = content
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_row(cls, row) -> "CachedMessage":
+        return cls(row.id, row.ticket_id, row.sender_id, row.sender_name, row.content, row.timestamp)
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "CachedMessage":
+        """From a chat payload (app/core/chat_bus.message_payload), as delivered or decoded from JSON."""
+        timestamp = payload["timestamp"]
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        return cls(payload["id"], payload["ticket_id"], payload["sender_id"], payload["sender_name"],
+                   payload["message"], timestamp)
+
+    def size(self) -> int:
+        return _MESSAGE_OVERHEAD + sys.getsizeof(self.content) + sys.getsizeof(self.sender_name)
+
+
+class _Entry:
+    __slots__ = ("ids", "messages", "complete", "filling", "size")
+
+    def __init__(self):
+        self.ids: list[int] = []
+        self.messages: list[CachedMessage] = []  # by id
+        self.complete = False  # holds the ticket's whole history
+        self.filling = True  # created by begin_fill, not filled yet: messages only collect
+        self.size = 0
+
+
+class MessageCache:
+    def __init__(self, per_ticket: int, max_bytes: int):
+        self.per_ticket = per_ticket
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._size = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_ticket > 0 and self._max_bytes > 0
+
+    def window(self, ticket_id: int, before_id: int | None = None, after_id: int | None = None,
+               limit: int = 100) -> tuple[list[CachedMessage], bool] | None:
+        """get_old_messages_for_ticket_id's (rows, has_more) from the cache, None when it does not hold the window."""
+        entry = self._entries.get(ticket_id)
+        if entry is None or entry.filling:
+            return None
+        ids, messages = entry.ids, entry.messages
+        if after_id is not None:
+            # everything after after_id is held when it is not older than the oldest held message
+            if not entry.complete and (not ids or after_id < ids[0]):
+                return None
+            start = bisect.bisect_right(ids, after_id)
+            rows = messages[start:start + limit]
+            has_more = len(messages) - start > limit
+        else:
+            end = len(ids) if before_id is None else bisect.bisect_left(ids, before_id)
+            if end <= limit and not entry.complete:
+                return None  # the window (and whether there is more) reaches past the oldest held message
+            rows = messages[max(end - limit, 0):end]
+            has_more = end > limit
+        self._entries.move_to_end(ticket_id)
+        return rows, has_more
+
+    def begin_fill(self, ticket_id: int):
+        """Starts collecting the ticket's deliveries, before its history is read for fill()."""
+        if self.enabled and ticket_id not in self._entries:
+            self._entries[ticket_id] = _Entry()
+
+    def fill(self, ticket_id: int, rows: list, complete: bool):
+        """
+        Fills the entry begun by begin_fill with the latest history rows, oldest
+        first (complete: they are the whole history), merged with the
+        deliveries collected meanwhile; nothing if it was evicted or dropped.
+        """
+        entry = self._entries.get(ticket_id)
+        if entry is None or not entry.filling:
+            return
+        for row in rows:
+            self._insert(entry, CachedMessage.from_row(row))
+        entry.filling = False
+        entry.complete = complete
+        self._trim(entry)
+        self._entries.move_to_end(ticket_id)
+        self._evict()
+
+    def add(self, ticket_id: int, payload: dict):
+        """A message delivered on the ticket's channel."""
+        entry = self._entries.get(ticket_id)
+        if entry is None:
+            return
+        self._insert(entry, CachedMessage.from_payload(payload))
+        if not entry.filling:
+            self._trim(entry)
+        elif len(entry.ids) > self.per_ticket:
+            self.drop(ticket_id)  # a flood during the fill: trimming it would leave a gap before it
+        self._evict()
+
+    def wants(self, ticket_id: int) -> bool:
+        return ticket_id in self._entries
+
+    def drop(self, ticket_id: int):
+        entry = self._entries.pop(ticket_id, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def _insert(self, entry: _Entry, message: CachedMessage):
+        # a ticket's deliveries come in commit order, which is its id order; the fill's rows may repeat them
+        position = bisect.bisect_left(entry.ids, message.id)
+        if position < len(entry.ids) and entry.ids[position] == message.id:
+            return
+        if not entry.filling and not entry.complete and position == 0 and entry.ids:
+            return  # older than the held range: it would leave a gap
+        entry.ids.insert(position, message.id)
+        entry.messages.insert(position, message)
+        self._resize(entry, message.size())
+
+    def _trim(self, entry: _Entry):
+        excess = len(entry.ids) - self.per_ticket
+        if excess > 0:
+            self._resize(entry, -sum(message.size() for message in entry.messages[:excess]))
+            del entry.ids[:excess], entry.messages[:excess]
+            entry.complete = False
+
+    def _resize(self, entry: _Entry, delta: int):
+        entry.size += delta
+        self._size += delta
+
+    def _evict(self):
+        while self._size > self._max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._size -= entry.size
+
+
+message_cache = MessageCache(per_ticket=settings.MESSAGE_CACHE_PER_TICKET, max_bytes=settings.MESSAGE_CACHE_MAX_BYTES)
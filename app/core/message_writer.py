@@ -0,0 +1,158 @@
+"""
+Write-behind persistence of chat messages.
+
+The websocket handler does not run a transaction per chat line: it queues the
+message and goes back to reading frames. One background task per worker
+collects the queue into batches (up to MESSAGE_WRITE_BATCH_SIZE messages, or
+whatever arrived within MESSAGE_WRITE_INTERVAL_MS of the first one) and writes
+each batch in one transaction:
+- a transaction advisory lock on each of the batch's tickets, in ticket id order
+- one multi-row INSERT ... RETURNING for the messages, ids in queue order
+- SLA first-response stamps for the batch's first agent replies
+- one pg_notify per message (app/core/chat_bus.py), in the same order
+Ids come from the sequence at insert time, not at commit time, and every
+worker has a writer of its own: without the lock, a worker could insert id 100
+and commit after another worker inserted and committed 101 on the same ticket,
+and a client resuming after 101 would never see 100. The lock makes a ticket's
+ids follow its commit order: a message is only inserted once every earlier
+transaction writing to the ticket has committed, so resuming from the last id
+seen misses nothing. Across tickets ids are not in commit order.
+
+submit() returns a future resolved with the message id once its transaction
+has committed: that is the durable ack the handler sends back to the client.
+If a batch fails, its messages are retried one per transaction, so one bad
+message (a ticket deleted meanwhile) fails alone.
+
+The queue is bounded by MESSAGE_WRITE_MAX_PENDING: when the database falls
+behind, submit() waits, which stops reading from the websockets instead of
+growing memory. stop() writes what is still queued.
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy import insert, text
+
+from app.core import settings
+from app.core.chat_bus import channel, message_payload, notify_body
+from app.core.read_routing import mark_write
+from app.database import AsyncSessionLocal
+from app.models.message import Message
+from app.operations import sla
+
+logger = logging.getLogger(__name__)
+
+# the batch's tickets' locks, held until commit: array order (sorted), so two writers cannot deadlock
+_LOCK_TICKETS = text(
+    "SELECT count(pg_advisory_xact_lock(:lock_class, t)) FROM (SELECT unnest(CAST(:ticket_ids AS int[])) AS t) AS u"
+)
+_TICKET_LOCK_CLASS = 0x6d73  # first key of the (class, ticket id) advisory lock pair
+
+# one NOTIFY per message, in batch order, in one statement
+_NOTIFY_ALL = text(
+    "SELECT pg_notify(c, b) FROM unnest(CAST(:channels AS text[]), CAST(:bodies AS text[])) AS n(c, b)"
+)
+
+
+async def lock_tickets(db, ticket_ids):
+    """Takes the tickets' message locks, until db commits: insert a ticket's messages only under its lock."""
+    await db.execute(_LOCK_TICKETS, {"lock_class": _TICKET_LOCK_CLASS, "ticket_ids": sorted(ticket_ids)})
+
+
+class PendingMessage:
+    __slots__ = ("ticket_id", "sender_id", "sender_name", "content", "first_response", "written")
+
+    def __init__(self, ticket_id: int, sender_id: int, sender_name: str, content: str, first_response: bool):
+        self.ticket_id = ticket_id
+        self.sender_id = sender_id
+        self.sender_name = sender_name
+        self.content = content
+        self.first_response = first_response
+        self.written: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class MessageWriter:
+    def __init__(self, batch_size: int, interval_ms: int, max_pending: int):
+        self._batch_size = batch_size
+        self._interval = interval_ms / 1000
+        self._max_pending = max_pending
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self._max_pending)
+        self._task = asyncio.create_task(self._write_forever())
+
+    async def stop(self):
+        """Writes the queued messages, then stops."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def submit(self, ticket_id: int, sender_id: int, sender_name: str, content: str,
+                     first_response: bool = False) -> asyncio.Future:
+        """Queues a message: a future of its id, set once committed (or of the error)."""
+        message = PendingMessage(ticket_id, sender_id, sender_name, content, first_response)
+        await self._queue.put(message)
+        return message.written
+
+    async def _write_forever(self):
+        while True:
+            batch = [await self._queue.get()]
+            if self._batch_size > 1 and self._interval:
+                # give the burst the first message belongs to a moment to arrive
+                await asyncio.sleep(self._interval)
+            while len(batch) < self._batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: list):
+        try:
+            ids = await self._insert(batch)
+        except Exception:
+            if len(batch) == 1:
+                logger.exception("chat message of ticket %s could not be saved", batch[0].ticket_id)
+                if not batch[0].written.done():
+                    batch[0].written.set_exception(RuntimeError("message could not be saved"))
+                return
+            for message in batch:
+                await self._write([message])
+            return
+        for message, message_id in zip(batch, ids):
+            mark_write(message.sender_id)
+            if not message.written.done():
+                message.written.set_result(message_id)
+
+    async def _insert(self, batch: list) -> list[int]:
+        async with AsyncSessionLocal() as db:
+            await lock_tickets(db, {m.ticket_id for m in batch})
+            written = (await db.execute(
+                insert(Message).returning(Message.id, Message.timestamp, sort_by_parameter_order=True),
+                [{"ticket_id": m.ticket_id, "sender_id": m.sender_id, "content": m.content} for m in batch],
+            )).all()
+            for message in batch:
+                if message.first_response:
+                    await sla.record_first_response(db, message.ticket_id, message.sender_id)
+            await db.execute(_NOTIFY_ALL, {
+                "channels": [channel(m.ticket_id) for m in batch],
+                "bodies": [
+                    notify_body(message_payload(message_id, m.ticket_id, m.content, m.sender_id, m.sender_name, timestamp))
+                    for m, (message_id, timestamp) in zip(batch, written)
+                ],
+            })
+            await db.commit()
+        return [message_id for message_id, _ in written]
+
+
+message_writer = MessageWriter(
+    batch_size=settings.MESSAGE_WRITE_BATCH_SIZE,
+    interval_ms=settings.MESSAGE_WRITE_INTERVAL_MS,
+    max_pending=settings.MESSAGE_WRITE_MAX_PENDING,
+)
@@ -0,0 +1,54 @@
+"""
+Keyset (cursor) pagination.
+
+A page is ordered by a unique key such as (created_at, id); the cursor is the
+key of the last row, base64 encoded so clients treat it as opaque. The next
+page starts with `WHERE (created_at, id) < (:created_at, :id)`, an index
+range scan, so page N costs the same as page 1 (OFFSET reads and discards
+every skipped row).
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not produced by encode_cursor; answered with 400 (see main.py)."""
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key_columns) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(key_columns):
+            raise InvalidCursor("Invalid cursor")
+        return [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else column.type.python_type(value)
+            for column, value in zip(key_columns, values)
+        ]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+async def fetch_page(db: AsyncSession, query, key_columns, cursor: str | None, limit: int, descending: bool = True):
+    """Runs `query` one page at a time along `key_columns`; returns (rows, next_cursor)."""
+    if cursor:
+        key = tuple_(*key_columns)
+        values = tuple_(*decode_cursor(cursor, key_columns))
+        query = query.filter(key < values if descending else key > values)
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in key_columns])
+
+    # one extra row tells whether there is a next page
+    rows = (await db.execute(query.limit(limit + 1))).scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], column.key) for column in key_columns])
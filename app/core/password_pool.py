@@ -0,0 +1,73 @@
+"""
+Process pool for bcrypt.
+
+bcrypt is deliberately slow CPU work. Run on the default threadpool, a login
+burst fills every thread and starves all other sync work; under the GIL it
+also does not scale with cores. Hashing and verification run here on
+PASSWORD_POOL_WORKERS processes instead. At most PASSWORD_POOL_MAX_PENDING
+jobs wait beyond the busy workers; past that the call fails fast with
+PasswordPoolBusy (503) instead of queueing without bound.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core import security, settings
+
+
+class PasswordPoolBusy(Exception):
+    """Too many password hashes are already queued."""
+
+
+_executor: ProcessPoolExecutor | None = None
+_in_flight = 0
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: a forked worker would inherit the event loop and open database sockets
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+async def _run(func, *args):
+    global _in_flight
+    if settings.PASSWORD_POOL_WORKERS <= 0:
+        return await run_in_threadpool(func, *args)
+    if _in_flight >= settings.PASSWORD_POOL_WORKERS + settings.PASSWORD_POOL_MAX_PENDING:
+        raise PasswordPoolBusy("Too many concurrent password operations, retry shortly")
+    _in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+    finally:
+        _in_flight -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run(security.get_password_hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """(valid, new_hash); new_hash is set when the stored hash was made with another BCRYPT_ROUNDS."""
+    return await _run(security.verify_and_update_password, plain_password, hashed_password)
+
+
+def start_password_pool():
+    """Starts the worker processes up front so the first logins do not pay for the spawn."""
+    if settings.PASSWORD_POOL_WORKERS > 0:
+        executor = _get_executor()
+        for _ in range(settings.PASSWORD_POOL_WORKERS):
+            executor.submit(int)
+
+
+def shutdown_password_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
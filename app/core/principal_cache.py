@@ -0,0 +1,79 @@
+"""
+Per-process cache of authenticated principals, keyed by user id.
+
+get_current_user runs on every authenticated request; with this cache the
+users row is read once per PRINCIPAL_CACHE_TTL_SECONDS instead of once per
+request. update_user / delete_user invalidate their entry on this worker,
+other workers pick the change up when the entry expires.
+"""
+
+import time
+from collections import OrderedDict
+
+from app.core import settings
+from app.models.user import User, UserRole
+
+
+class Principal:
+    """The part of a user that authorization needs, detached from any session."""
+
+    __slots__ = ("id", "role", "name")
+
+    def __init__(self, id: int, role: UserRole, name: str):
+        self.id = id
+        self.role = role
+        self.name = name
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, role=user.role, name=user.name)
+
+    def __repr__(self):
+        return f"Principal(id={self.id}, role={self.role.value})"
+
+
+class PrincipalCache:
+    """Bounded LRU with a TTL. Only touched from the event loop, so no locking."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[int, tuple[float, Principal]] = OrderedDict()
+        self.generation = 0
+
+    def get(self, user_id: int) -> Principal | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return principal
+
+    def put(self, principal: Principal, generation: int):
+        """
+        Stores a principal read from the database. `generation` is the value
+        read before the query; if an invalidation happened since, the row may
+        be stale and is not cached.
+        """
+        if self._max_size <= 0 or generation != self.generation:
+            return
+        self._entries[principal.id] = (time.monotonic() + self._ttl_seconds, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        self.generation += 1
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE, ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
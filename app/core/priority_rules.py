@@ -0,0 +1,130 @@
+"""
+Keyword priority rules compiled into one Aho-Corasick automaton.
+
+Every rule is a (keyword, priority) row of the priority_rules table. All
+keywords are compiled into a single automaton, so scoring a ticket is one pass
+over its text whatever the number of rules. A keyword matches anywhere in the
+lowercased title + description (plain substring, as before). The most severe
+matched priority wins; a ticket matching no rule is medium.
+
+The compiled scorer is cached per process: the rule endpoints invalidate it on
+this worker, other workers reload it within PRIORITY_RULES_TTL_SECONDS.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Iterable
+
+from sqlalchemy import select
+
+from app.core import settings
+from app.database import AsyncSessionLocal
+from app.models.priority_rule import PriorityRule
+from app.models.ticket import TicketPriority
+
+SEVERITY = {
+    TicketPriority.low: 0,
+    TicketPriority.medium: 1,
+    TicketPriority.high: 2,
+    TicketPriority.urgent: 3,
+}
+_BY_SEVERITY = {severity: priority for priority, severity in SEVERITY.items()}
+_MAX_SEVERITY = max(SEVERITY.values())
+DEFAULT_PRIORITY = TicketPriority.medium
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick over lowercase keywords. Each state stores the highest
+    severity of every keyword ending there, including through its failure
+    links, so a scan only keeps a running maximum.
+    """
+
+    def __init__(self, rules: Iterable[tuple[str, TicketPriority]]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._best: list[int] = [-1]
+        for keyword, priority in rules:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._best.append(-1)
+                state = next_state
+            self._best[state] = max(self._best[state], SEVERITY[priority])
+
+        # failure links, breadth first so a state's link is final before its children
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[child] = link if link != child else 0
+                self._best[child] = max(self._best[child], self._best[self._fail[child]])
+                queue.append(child)
+
+    def best_severity(self, text: str) -> int:
+        """Highest severity of any keyword in text, -1 when none matches."""
+        goto, fail, best = self._goto, self._fail, self._best
+        state, found = 0, -1
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if best[state] > found:
+                found = best[state]
+                if found == _MAX_SEVERITY:
+                    break
+        return found
+
+
+class PriorityScorer:
+    def __init__(self, rules: Iterable[tuple[str, TicketPriority]]):
+        self._automaton = KeywordAutomaton(rules)
+
+    def score(self, title: str, description: str) -> TicketPriority:
+        severity = self._automaton.best_severity(f"{title.lower()} {description.lower()}")
+        return _BY_SEVERITY[severity] if severity >= 0 else DEFAULT_PRIORITY
+
+    def score_many(self, tickets: Iterable[tuple[str, str]]) -> list[TicketPriority]:
+        return [self.score(title, description) for title, description in tickets]
+
+
+class PriorityRuleCache:
+    def __init__(self, ttl_seconds: float):
+        self._ttl_seconds = ttl_seconds
+        self._scorer: PriorityScorer | None = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> PriorityScorer:
+        scorer = self._scorer
+        if scorer is not None and time.monotonic() < self._expires_at:
+            return scorer
+        async with self._lock:
+            if self._scorer is not None and time.monotonic() < self._expires_at:
+                return self._scorer
+            generation = self._generation
+            async with AsyncSessionLocal() as db:
+                rules = (await db.execute(select(PriorityRule.keyword, PriorityRule.priority))).all()
+            scorer = PriorityScorer(rules)
+            if generation == self._generation:
+                self._scorer = scorer
+                self._expires_at = time.monotonic() + self._ttl_seconds
+            return scorer
+
+    def invalidate(self):
+        """Called after every committed rule change."""
+        self._generation += 1
+        self._scorer = None
+
+
+priority_rules = PriorityRuleCache(ttl_seconds=settings.PRIORITY_RULES_TTL_SECONDS)
@@ -0,0 +1,93 @@
+"""
+Read-your-writes stickiness for replica routing.
+
+After a successful POST/PUT/PATCH/DELETE the writer is pinned to the primary for
+DB_READ_STICKY_SECONDS, so a replica that is still catching up never hides the
+user's own change. Two records are kept:
+- an in-process map keyed by user id (bearer-only clients on the same worker)
+- a cookie with the deadline, so the pin also holds when the next request
+  lands on another worker
+"""
+
+import time
+
+from app.core import settings, security
+
+STICKY_COOKIE = "read_primary_until"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+_MAX_TRACKED_WRITERS = 100_000
+
+# user id -> monotonic deadline
+_recent_writers: dict[int, float] = {}
+
+
+def mark_write(user_id: int):
+    now = time.monotonic()
+    if len(_recent_writers) >= _MAX_TRACKED_WRITERS:
+        for writer, until in list(_recent_writers.items()):
+            if until < now:
+                del _recent_writers[writer]
+    _recent_writers[user_id] = now + settings.DB_READ_STICKY_SECONDS
+
+
+def _pinned(user_id: int) -> bool:
+    until = _recent_writers.get(user_id)
+    if until is None:
+        return False
+    if until < time.monotonic():
+        _recent_writers.pop(user_id, None)
+        return False
+    return True
+
+
+def user_id_from_authorization(authorization: str | None) -> int | None:
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    payload = security.decode_access_token(authorization[7:])
+    if not payload or payload.get("sub") is None:
+        return None
+    return int(payload["sub"])
+
+
+def reads_from_primary(authorization: str | None, sticky_cookie: str | None) -> bool:
+    """True when this request must read from the primary."""
+    if sticky_cookie:
+        try:
+            if float(sticky_cookie) > time.time():
+                return True
+        except ValueError:
+            pass
+    # cheap check first: skip the token decode while nobody wrote recently
+    if not _recent_writers:
+        return False
+    user_id = user_id_from_authorization(authorization)
+    return user_id is not None and _pinned(user_id)
+
+
+class ReadYourWritesMiddleware:
+    """Pins the author of a successful write to the primary for a short window."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS or not settings.DATABASE_REPLICA_URLS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                authorization = None
+                for name, value in scope["headers"]:
+                    if name == b"authorization":
+                        authorization = value.decode("latin-1")
+                        break
+                user_id = user_id_from_authorization(authorization)
+                if user_id is not None:
+                    mark_write(user_id)
+                until = time.time() + settings.DB_READ_STICKY_SECONDS
+                cookie = f"{STICKY_COOKIE}={until:.3f}; Max-Age={settings.DB_READ_STICKY_SECONDS}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
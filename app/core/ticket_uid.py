@@ -0,0 +1,218 @@
+"""
+Ticket UIDs: time ordered, unique across workers, no query per ticket.
+
+A UID is a 63-bit integer (snowflake layout)
+    41 bits  milliseconds since UID_EPOCH (good for ~69 years)
+    10 bits  worker id, unique among running processes
+    12 bits  sequence within the millisecond (4096 / ms / worker)
+written as 13 Crockford base32 characters, zero padded so that string order
+is numeric order: "TICKET-" + 13 = 20 characters, the width of ticket_uid.
+New UIDs sort by creation time, so inserts land at the right edge of the
+unique index instead of at random pages.
+
+Each process claims its worker id at startup with a Postgres session advisory
+lock held on a dedicated connection: the lock disappears with the process, so
+ids of crashed workers are reused safely. It also disappears with the
+connection, and then another process may claim the same id. So the connection
+is watched: a termination seen by the driver, or a check of pg_locks every
+TICKET_UID_LOCK_CHECK_SECONDS that fails or no longer finds the lock, drops
+the worker id at once and claims a free one on a new connection. In between,
+and in the moments a dead network takes to show, ticket creation fails instead
+of risking a duplicate (the unique index on ticket_uid rejects one that slips
+through the check interval). TICKET_UID_WORKER_ID overrides the claim (e.g.
+one id per host). A process must claim or configure its id before issuing
+UIDs: CLI scripts that create tickets claim one like the app does.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.core import settings
+
+PREFIX = "TICKET-"
+UID_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+_EPOCH_MS = int(UID_EPOCH.timestamp() * 1000)
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+_MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford: no I, L, O, U
+_WIDTH = 13
+_ADVISORY_LOCK_CLASS = 0x7469  # first key of the (class, worker id) advisory lock pair
+_MAX_RECLAIM_SECONDS = 30
+
+logger = logging.getLogger(__name__)
+
+
+def encode(value: int) -> str:
+    chars = []
+    for _ in range(_WIDTH):
+        value, digit = divmod(value, 32)
+        chars.append(_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def decode(encoded: str) -> int:
+    value = 0
+    for char in encoded.upper():
+        value = value * 32 + _ALPHABET.index(char)
+    return value
+
+
+def created_at(uid: str) -> datetime:
+    """When a UID made by this generator was issued (millisecond precision)."""
+    ms = decode(uid.removeprefix(PREFIX)) >> (WORKER_BITS + SEQUENCE_BITS)
+    return datetime.fromtimestamp((ms + _EPOCH_MS) / 1000, tz=timezone.utc)
+
+
+class TicketUidGenerator:
+    def __init__(self):
+        self.worker_id: int | None = None
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._engine = None
+        self._lock_connection = None
+        self._lock_driver = None
+        self._locked_id: int | None = None  # the worker id whose lock _lock_connection holds
+        self._watch: asyncio.Task | None = None
+
+    def next_uid(self) -> str:
+        return PREFIX + encode(self.next_id())
+
+    def next_ids(self, count: int) -> list[int]:
+        with self._lock:
+            return [self._next_id_locked() for _ in range(count)]
+
+    def next_id(self) -> int:
+        with self._lock:
+            return self._next_id_locked()
+
+    def _next_id_locked(self) -> int:
+        if self.worker_id is None:
+            raise RuntimeError("no ticket uid worker id: claim_worker_id() first, or set TICKET_UID_WORKER_ID")
+        now_ms = int(time.time() * 1000) - _EPOCH_MS
+        if now_ms > self._last_ms:
+            self._last_ms, self._sequence = now_ms, 0
+        elif self._sequence < _MAX_SEQUENCE:
+            # same millisecond, or the clock stepped back: keep counting from the last one
+            self._sequence += 1
+        else:
+            # 4096 in one millisecond: borrow the next one, the clock catches up
+            self._last_ms, self._sequence = self._last_ms + 1, 0
+        return (self._last_ms << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    async def claim_worker_id(self, engine):
+        """
+        Claims the lowest free worker id, holding its advisory lock until
+        release(), and keeps watching the lock (a lost one is claimed again).
+        """
+        if settings.TICKET_UID_WORKER_ID is not None:
+            if not 0 <= settings.TICKET_UID_WORKER_ID <= MAX_WORKER_ID:
+                # masking it would wrap onto an id another worker claims: duplicate uids
+                raise RuntimeError(f"TICKET_UID_WORKER_ID must be between 0 and {MAX_WORKER_ID}, "
+                                   f"got {settings.TICKET_UID_WORKER_ID}")
+            self.worker_id = settings.TICKET_UID_WORKER_ID
+            return self.worker_id
+        self._engine = engine
+        lost = await self._claim()
+        self._watch = asyncio.create_task(self._watch_forever(lost))
+        return self.worker_id
+
+    async def _claim(self) -> asyncio.Future:
+        connection = await self._engine.connect()
+        # one round trip: the first id whose lock is free, locked in the same statement
+        claimed = (await connection.execute(text(
+            "SELECT id FROM generate_series(0, :max_id) AS id "
+            "WHERE pg_try_advisory_lock(:lock_class, id) LIMIT 1"
+        ), {"max_id": MAX_WORKER_ID, "lock_class": _ADVISORY_LOCK_CLASS})).scalar()
+        await connection.commit()
+        if claimed is None:
+            await connection.close()
+            raise RuntimeError(f"all {MAX_WORKER_ID + 1} ticket uid worker ids are taken")
+        driver = (await connection.get_raw_connection()).driver_connection
+        lost = asyncio.get_running_loop().create_future()
+
+        def on_termination(_):
+            # stop issuing the moment the driver sees the connection go, not at the next check
+            if self._lock_driver is driver:
+                self._drop_worker_id()
+            if not lost.done():
+                lost.set_result(None)
+
+        driver.add_termination_listener(on_termination)
+        self._lock_connection, self._lock_driver, self._locked_id = connection, driver, claimed
+        with self._lock:
+            self.worker_id = claimed
+        return lost
+
+    def _drop_worker_id(self):
+        with self._lock:
+            self.worker_id = None
+
+    async def _holds_lock(self, worker_id: int) -> bool:
+        return await asyncio.wait_for(self._lock_driver.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid()"
+            " AND classid::int = $1 AND objid::int = $2 AND objsubid = 2 AND granted)",
+            _ADVISORY_LOCK_CLASS, worker_id,
+        ), settings.TICKET_UID_LOCK_CHECK_SECONDS)
+
+    async def _watch_forever(self, lost: asyncio.Future):
+        while True:
+            try:
+                while not lost.done():
+                    # a dead network only shows when something is sent
+                    await asyncio.wait([lost], timeout=settings.TICKET_UID_LOCK_CHECK_SECONDS)
+                    if not lost.done() and not await self._holds_lock(self._locked_id):
+                        break
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass  # the check failed: the lock may be gone with the connection
+            self._drop_worker_id()
+            logger.warning("ticket uid worker id %s lost with its lock, claiming one again", self._locked_id)
+            await self._close_lock_connection()
+            lost = await self._reclaim()
+
+    async def _reclaim(self) -> asyncio.Future:
+        delay = 1
+        while True:
+            try:
+                lost = await self._claim()
+                logger.warning("ticket uid worker id %s claimed", self.worker_id)
+                return lost
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("ticket uid worker id claim failed, retrying in %ss", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_RECLAIM_SECONDS)
+
+    async def _close_lock_connection(self):
+        connection, self._lock_connection, self._lock_driver = self._lock_connection, None, None
+        if connection is not None:
+            try:
+                # invalidate, not close: a pooled connection would keep the lock
+                await connection.invalidate()
+            except Exception:
+                pass
+
+    async def release(self):
+        if self._watch is not None:
+            self._watch.cancel()
+            try:
+                await self._watch
+            except asyncio.CancelledError:
+                pass
+            self._watch = None
+        if self._lock_connection is not None:
+            self._drop_worker_id()
+            await self._close_lock_connection()
+
+
+ticket_uid_generator = TicketUidGenerator()
@@ -1,27 +1,41 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 
 from app.database import get_db
 from app.models.user import User  # We'll need schemas for token data
 from app.core import security # Import your security functions
+from app.core.principal_cache import Principal, principal_cache
 from app.models.user import UserRole
 
 # This tells FastAPI where the token can be obtained from.
 # The "tokenUrl" should point to your login endpoint.
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(
+async def load_principal(db: AsyncSession, user_id: int) -> Principal | None:
+    """The principal for user_id, from the principal cache or else the users table."""
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    generation = principal_cache.generation
+    user = await db.get(User, user_id)
+    if user is None:
+        return None
+    principal = Principal.from_user(user)
+    principal_cache.put(principal, generation)
+    return principal
+
+async def get_current_user(
     token: str = Depends(oauth2_scheme), 
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
     """
     Dependency to get the current user from a JWT token.
     1. Decodes the JWT token.
     2. Extracts the user ID ('sub').
-    3. Fetches the user from the database.
-    4. Returns the user object.
+    3. Fetches the user from the principal cache, or the database on a miss.
+    4. Returns the user's Principal (id, role, name).
     Raises HTTPException if the token is invalid or the user doesn't exist.
     """
     credentials_exception = HTTPException(
@@ -43,15 +57,15 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
+    principal = await load_principal(db, int(user_id))
+    if principal is None:
         raise credentials_exception
         
-    return user
+    return principal
 
 def get_current_admin(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Dependency that relies on get_current_user and then checks
     if the user has the 'admin' role.
@@ -64,8 +78,8 @@ def get_current_admin(
     return current_user
 
 def get_current_agent (
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Dependency that relies on get_current_user and then checks
     if the user has the 'agent' role.
@@ -3,8 +3,12 @@ from app.models.ticket_transfer import TicketTransfer
 from app.models.category import Category
 from app.models.subcategory import Subcategory
 from app.models.agent_category_assignment import AgentCategoryAssignment
+from app.models.agent_capacity import AgentCapacity
 from app.models.message import Message
 from app.models.user import User
 from app.database import Base
 from app.models.ticket_note import TicketNote
+from app.models.priority_rule import PriorityRule
 
+from app.models.ticket_stat import TicketStat
+from app.models.sla_rollup import SlaRollup
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, ForeignKey, text
+from app.database import Base
+
+class AgentCapacity(Base):
+    """
+    Active ticket counter per agent, the row assignment locks.
+    Kept in step with tickets in the same transaction, see app/operations/assignment.py.
+    """
+    __tablename__ = "agent_capacity"
+
+    agent_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    active_tickets = Column(Integer, nullable=False, default=0, server_default=text("0"))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Integer, Text, TIMESTAMP, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -14,3 +14,8 @@ class Message(Base):
 
     ticket = relationship("Ticket", back_populates="messages")
     sender = relationship("User")
+
+    __table_args__ = (
+        # chat history windows and websocket resume of a ticket (app/operations/message.py)
+        Index("ix_messages_ticket_id_id", "ticket_id", "id"),
+    )
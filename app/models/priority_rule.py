@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Enum, TIMESTAMP
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.ticket import TicketPriority
+
+class PriorityRule(Base):
+    """A keyword that gives a ticket a priority, see app/core/priority_rules.py."""
+    __tablename__ = "priority_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    keyword = Column(String(100), unique=True, nullable=False)  # stored lowercase
+    priority = Column(Enum(TicketPriority), nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, SmallInteger, Enum, TIMESTAMP, ForeignKey, text
+from app.database import Base
+from enum import Enum as PyEnum
+
+class SlaMetric(PyEnum):
+    first_response = "first_response"  # ticket created -> first agent message
+    resolution = "resolution"  # ticket created -> first resolved / closed
+
+class SlaGranularity(PyEnum):
+    hour = "hour"
+    day = "day"
+
+class SlaRollup(Base):
+    """
+    Histogram of SLA durations per time bucket, agent and category: how many
+    tickets of the bucket fell in each duration bin. Percentiles are read from
+    these rows, see app/operations/sla.py.
+    """
+    __tablename__ = "sla_rollups"
+
+    metric = Column(Enum(SlaMetric), primary_key=True)
+    granularity = Column(Enum(SlaGranularity), primary_key=True)
+    bucket_start = Column(TIMESTAMP, primary_key=True)  # start of the hour / day the event happened in
+    agent_id = Column(Integer, primary_key=True)  # 0: no agent
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    bin = Column(SmallInteger, primary_key=True)  # duration bin, app/operations/sla.py
+    tickets = Column(Integer, nullable=False, default=0, server_default=text("0"))
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, Enum, TIMESTAMP, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, String, Text, Enum, TIMESTAMP, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from app.database import Base
 from enum import Enum as PyEnum
@@ -36,6 +37,14 @@ class Ticket(Base):
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     closed_at = Column(TIMESTAMP, nullable=True)
+    # SLA timestamps, set once (app/operations/sla.py)
+    first_response_at = Column(TIMESTAMP, nullable=True)
+    resolved_at = Column(TIMESTAMP, nullable=True)
+    # full-text document over title and description, maintained by Postgres (app/operations/search.py)
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', coalesce(title, '') || ' ' || coalesce(initial_description, ''))", persisted=True),
+    ))
     
 
    
@@ -54,3 +63,18 @@ class Ticket(Base):
     # Link to the ticket's subcategory
     subcategory = relationship("Subcategory")
 
+    __table_args__ = (
+        # least-loaded agent lookup (_find_best_agent)
+        Index("ix_tickets_agent_id_status", "agent_id", "status"),
+        # per user / per agent listings (get_tickets)
+        Index("ix_tickets_user_id_created_at", "user_id", "created_at"),
+        Index("ix_tickets_agent_id_created_at", "agent_id", "created_at"),
+        # admin listing, keyset order (app/core/pagination.py)
+        Index("ix_tickets_created_at_id", "created_at", "id"),
+        # admin reopen queue (get_all_reopen_requests)
+        Index("ix_tickets_requested_reopen", "id", postgresql_where=text("status = 'requested_reopen'")),
+        # ticket search (app/operations/search.py)
+        Index("ix_tickets_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_tickets_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Enum, ForeignKey, text
+from app.database import Base
+from app.models.ticket import TicketPriority, TicketStatus
+
+class TicketStat(Base):
+    """
+    Number of tickets per (status, priority, category, agent), the dashboard's
+    source. Kept in step with tickets in the same transaction, see
+    app/operations/ticket_stats.py.
+    """
+    __tablename__ = "ticket_stats"
+
+    status = Column(Enum(TicketStatus), primary_key=True)
+    priority = Column(Enum(TicketPriority), primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    agent_id = Column(Integer, primary_key=True)  # 0: unassigned (a primary key column cannot be NULL)
+    tickets = Column(Integer, nullable=False, default=0, server_default=text("0"))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, TIMESTAMP, Enum, ForeignKey
+from sqlalchemy import Column, Integer, Text, TIMESTAMP, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -17,7 +17,7 @@ class TicketTransfer(Base):
     from_agent_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     to_agent_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     request_reason = Column(Text)
-    status = Column(Enum(TransferStatus), default=TransferStatus.pending, nullable=False)
+    status = Column(Enum(TransferStatus), default=TransferStatus.pending, nullable=False, index=True)
     requested_at = Column(TIMESTAMP, server_default=func.now())
     resolved_by_admin_id = Column(Integer, ForeignKey("users.id"))
     resolved_at = Column(TIMESTAMP)
@@ -27,3 +27,7 @@ class TicketTransfer(Base):
     to_agent = relationship("User", foreign_keys=[to_agent_id])
     resolved_by_admin = relationship("User", foreign_keys=[resolved_by_admin_id])
 
+    __table_args__ = (
+        # transfer listing, keyset order (app/core/pagination.py)
+        Index("ix_ticket_transfers_requested_at_id", "requested_at", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, TIMESTAMP
+from sqlalchemy import Column, Integer, String, Enum, TIMESTAMP, Index
 from sqlalchemy.sql import func
 from app.database import Base
 from enum import Enum as PyEnum
@@ -32,3 +32,11 @@ class User(Base):
         secondary="agent_category_assignments",
         back_populates="assigned_agents"
     )
+
+    __table_args__ = (
+        # user listing, keyset order (app/core/pagination.py)
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # substring search on the ticket creator (app/operations/search.py)
+        Index("ix_users_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_users_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+    )
@@ -0,0 +1,138 @@
+"""
+Agent assignment against the agent_capacity counters.
+
+Reading "the least loaded agent" and inserting the ticket in two steps lets a
+burst of concurrent requests all read the same agent. Here the assignment
+locks the agent_capacity rows of all of the category's agents (in agent id
+order) and then charges the least loaded one on the committed counts; the rows
+stay locked until the ticket's transaction commits, so assignment within a
+category is serialized and every ticket goes to the agent that is least loaded
+at that moment. Skipping locked rows instead would hand a burst to whichever
+agents happen not to be mid-assignment, and waiting on the one row that looked
+least loaded would pile the burst onto it: both break the spread.
+
+Rows are per agent, so categories without common agents never wait on each
+other, and the lock order is the one adjust_loads uses, so assignments and
+transfers cannot deadlock. Status changes and transfers move the counters in
+the same transaction as the ticket update. The in-memory index
+(app/core/agent_load.py) supplies the category's agents and is updated from
+RETURNING after commit.
+"""
+
+import heapq
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.agent_load import agent_load_index
+from app.models.agent_capacity import AgentCapacity
+
+
+async def claim_agent(db: AsyncSession, category_id: int) -> tuple[int, int] | None:
+    """
+    Charges one active ticket to the least loaded agent of the category:
+    (agent_id, new active count), or None if the category has no agents.
+    """
+    candidates = agent_load_index.agents_in(category_id)
+    if not candidates:
+        return None
+    # waits for concurrent assignments to the category to commit; the UPDATE
+    # below then sees their counts (a new snapshot per statement)
+    await db.execute(
+        select(AgentCapacity.agent_id)
+        .filter(AgentCapacity.agent_id.in_(candidates))
+        .order_by(AgentCapacity.agent_id)
+        .with_for_update()
+    )
+    least_loaded = (
+        select(AgentCapacity.agent_id)
+        .filter(AgentCapacity.agent_id.in_(candidates))
+        .order_by(AgentCapacity.active_tickets, AgentCapacity.agent_id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    row = (await db.execute(
+        update(AgentCapacity)
+        .filter(AgentCapacity.agent_id == least_loaded)
+        .values(active_tickets=AgentCapacity.active_tickets + 1)
+        .returning(AgentCapacity.agent_id, AgentCapacity.active_tickets)
+        .execution_options(synchronize_session=False)
+    )).first()
+    return (row.agent_id, row.active_tickets) if row else None
+
+
+async def adjust_loads(db: AsyncSession, deltas: dict[int | None, int]) -> dict[int, int]:
+    """
+    Adds deltas to agents' active counts: {agent_id: new active count}.
+    Rows are locked in agent id order, so two transfers between the same
+    agents in opposite directions cannot deadlock.
+    """
+    deltas = {agent_id: delta for agent_id, delta in deltas.items() if agent_id is not None and delta}
+    if not deltas:
+        return {}
+    locked = (
+        select(AgentCapacity.agent_id)
+        .filter(AgentCapacity.agent_id.in_(deltas))
+        .order_by(AgentCapacity.agent_id)
+        .with_for_update()
+    )
+    rows = (await db.execute(
+        update(AgentCapacity)
+        .filter(AgentCapacity.agent_id.in_(locked))
+        .values(active_tickets=func.greatest(
+            AgentCapacity.active_tickets + case(deltas, value=AgentCapacity.agent_id, else_=0), 0
+        ))
+        .returning(AgentCapacity.agent_id, AgentCapacity.active_tickets)
+        .execution_options(synchronize_session=False)
+    )).all()
+    return dict(rows)
+
+
+async def add_agent_capacity(db: AsyncSession, agent_id: int):
+    """Creates the counter row of a new agent (idempotent); committed by the caller."""
+    await db.execute(
+        pg_insert(AgentCapacity).values(agent_id=agent_id, active_tickets=0).on_conflict_do_nothing()
+    )
+
+
+async def claim_agents_bulk(db: AsyncSession, counts: dict[int, int]) -> tuple[dict[int, list[int | None]], dict[int, int]]:
+    """
+    Assigns counts[category_id] new tickets per category in one pass:
+    ({category_id: agent per ticket, None where the category has no agents},
+    {agent_id: new active count}).
+
+    The agent rows of every category involved are locked up front (in id
+    order), then tickets are water-filled onto the least loaded agents, so the
+    import ends as level as assigning them one by one would, for one UPDATE.
+    """
+    candidates = {category_id: agent_load_index.agents_in(category_id) for category_id in counts}
+    agent_ids = set().union(*candidates.values())
+    loads = {}
+    if agent_ids:
+        loads = dict((await db.execute(
+            select(AgentCapacity.agent_id, AgentCapacity.active_tickets)
+            .filter(AgentCapacity.agent_id.in_(agent_ids))
+            .order_by(AgentCapacity.agent_id)
+            .with_for_update()
+        )).all())
+    before = dict(loads)
+
+    assignments = {}
+    for category_id, count in sorted(counts.items()):
+        heap = [(loads[agent_id], agent_id) for agent_id in candidates[category_id] if agent_id in loads]
+        if not heap:
+            assignments[category_id] = [None] * count
+            continue
+        heapq.heapify(heap)
+        chosen = []
+        for _ in range(count):
+            load, agent_id = heapq.heappop(heap)
+            chosen.append(agent_id)
+            heapq.heappush(heap, (load + 1, agent_id))
+        for load, agent_id in heap:
+            loads[agent_id] = load
+        assignments[category_id] = chosen
+
+    new_loads = await adjust_loads(db, {agent_id: loads[agent_id] - before[agent_id] for agent_id in loads})
+    return assignments, new_loads
@@ -0,0 +1,176 @@
+"""
+Bulk ticket import (old helpdesk migrations, email backlog replays).
+
+A whole file is one transaction and a fixed number of statements whatever its
+size, instead of a request, two assignment queries, a commit and a refresh per
+ticket:
+1. parse and validate every row (JSONL or CSV), collecting per-row errors
+2. check categories against the category cache and creators in one query
+3. score all priorities with the compiled rules (app/core/priority_rules.py)
+4. assign agents per category in one locked pass (assignment.claim_agents_bulk)
+5. take a batch of ticket uids (app/core/ticket_uid.py)
+6. insert with COPY (asyncpg copy_records_to_table), and add the dashboard
+   counters (app/operations/ticket_stats.py) in the same transaction
+Rows with errors are skipped and reported, the valid rows are imported.
+"""
+
+import csv
+import io
+import json
+from collections import Counter
+from datetime import timezone
+
+from pydantic import ValidationError
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.agent_load import agent_load_index
+from app.core.category_cache import CategoryTree, category_cache
+from app.core.priority_rules import priority_rules
+from app.core.ticket_uid import PREFIX, encode, ticket_uid_generator
+from app.models.ticket import Ticket, TicketStatus
+from app.models.user import User
+from app.operations import assignment, ticket_stats
+from app.schemas.bulk_import import BulkTicketRow
+
+FORMATS = ("jsonl", "csv")
+MAX_REPORTED_ERRORS = 1000
+_COPY_COLUMNS = (
+    "ticket_uid", "user_id", "agent_id", "category_id", "subcategory_id", "title",
+    "initial_description", "status", "priority", "created_at", "updated_at",
+)
+
+
+def _raw_rows(data: str, format: str):
+    """(line number, dict or error message) per input row."""
+    if format == "jsonl":
+        for line_number, line in enumerate(data.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_number, f"invalid JSON: {exc.msg}"
+                continue
+            yield line_number, row if isinstance(row, dict) else "expected a JSON object"
+    else:
+        reader = csv.DictReader(io.StringIO(data, newline=""))
+        for row in reader:
+            # empty cells are missing values; line_num is where the (possibly multi-line) row ends
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ("", None)}
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+
+
+def _parse(data: str, format: str, tree: CategoryTree):
+    """Validated rows and errors. CPU bound, runs in the threadpool."""
+    valid, errors = [], []
+    for line_number, raw in _raw_rows(data, format):
+        if isinstance(raw, str):
+            errors.append((line_number, raw))
+            continue
+        try:
+            row = BulkTicketRow.model_validate(raw)
+        except ValidationError as exc:
+            errors.append((line_number, _validation_message(exc)))
+            continue
+        category = tree.by_id.get(row.category_id)
+        if category is None:
+            errors.append((line_number, f"category {row.category_id} not found"))
+        elif row.subcategory_id is not None and not category.has_subcategory(row.subcategory_id):
+            errors.append((line_number, f"subcategory {row.subcategory_id} not found in category {row.category_id}"))
+        else:
+            valid.append((line_number, row))
+    return valid, errors
+
+
+async def _resolve_creators(db: AsyncSession, rows, default_user_id: int):
+    """Creator id per row (None: unknown user), with one query for all referenced users."""
+    ids = {row.user_id for _, row in rows if row.user_id is not None}
+    emails = {row.user_email.lower() for _, row in rows if row.user_id is None and row.user_email}
+    known_ids, id_by_email = set(), {}
+    if ids or emails:
+        for user_id, email in (await db.execute(
+            select(User.id, User.email).filter(or_(User.id.in_(ids), func.lower(User.email).in_(emails)))
+        )).all():
+            known_ids.add(user_id)
+            id_by_email[email.lower()] = user_id
+    creators = []
+    for _, row in rows:
+        if row.user_id is not None:
+            creators.append(row.user_id if row.user_id in known_ids else None)
+        elif row.user_email:
+            creators.append(id_by_email.get(row.user_email.lower()))
+        else:
+            creators.append(default_user_id)
+    return creators
+
+
+async def import_tickets(db: AsyncSession, data: str, format: str, default_user_id: int):
+    """Imports every valid row of data (JSONL or CSV text) in one transaction."""
+    tree = await category_cache.get()
+    rows, errors = await run_in_threadpool(_parse, data, format, tree)
+    received = len(rows) + len(errors)
+
+    creators = await _resolve_creators(db, rows, default_user_id)
+    accepted = []
+    for (line_number, row), user_id in zip(rows, creators):
+        if user_id is None:
+            errors.append((line_number, f"user {row.user_id if row.user_id is not None else row.user_email} not found"))
+        else:
+            accepted.append((row, user_id))
+    errors.sort()
+
+    by_priority = Counter()
+    if accepted:
+        scorer = await priority_rules.get()
+        priorities = await run_in_threadpool(
+            scorer.score_many, [(row.title, row.initial_description) for row, _ in accepted]
+        )
+        by_priority.update(priority.value for priority in priorities)
+
+        assignments, loads = await assignment.claim_agents_bulk(
+            db, Counter(row.category_id for row, _ in accepted)
+        )
+        uids = ticket_uid_generator.next_ids(len(accepted))
+        now = (await db.execute(select(func.localtimestamp()))).scalar()
+
+        records, stats = [], Counter()
+        next_agent = {category_id: iter(agents) for category_id, agents in assignments.items()}
+        for (row, user_id), priority, uid in zip(accepted, priorities, uids):
+            agent_id = next(next_agent[row.category_id])
+            status = TicketStatus.assigned if agent_id else TicketStatus.open
+            stats[ticket_stats.stat_key(status, priority, row.category_id, agent_id)] += 1
+            created_at = row.created_at
+            if created_at is None:
+                created_at = now
+            elif created_at.tzinfo is not None:
+                created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+            records.append((
+                PREFIX + encode(uid), user_id, agent_id, row.category_id, row.subcategory_id, row.title,
+                row.initial_description,
+                status.name, priority.name,
+                created_at, now,
+            ))
+
+        # COPY on the session's own connection, inside its transaction
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            Ticket.__tablename__, records=records, columns=_COPY_COLUMNS
+        )
+        await ticket_stats.record(db, stats)
+        await db.commit()
+        agent_load_index.set_loads(loads)
+
+    return {
+        "received": received,
+        "imported": len(accepted),
+        "failed": len(errors),
+        "by_priority": dict(by_priority),
+        "errors": [{"row": row, "error": error} for row, error in errors[:MAX_REPORTED_ERRORS]],
+        "errors_truncated": len(errors) > MAX_REPORTED_ERRORS,
+    }
@@ -11,7 +11,10 @@
 8 Category id provided to see list of name of cat and subcategories[ {id, name} ]
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.core.category_cache import category_cache
 from app.models.category import Category
 from app.models.subcategory import Subcategory
 from app.schemas.category import Category as category_schema
@@ -19,60 +22,80 @@ from app.schemas.category import Subcategory as subcategory_schema
 from app.schemas.category import CategoryOut as category_out_schema
 from app.schemas.category import SubcategoryOut as subcategory_out_schema
 
-def create_category(db: Session, category_data: category_schema):
+async def create_category(db: AsyncSession, category_data: category_schema):
     db_category = Category(**category_data.model_dump())
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
-    return db_category
-    
-def create_subcategory(db: Session, subcategory_data: subcategory_schema):
+    await db.commit()
+    category_cache.invalidate()
+    return await category_by_id(db, db_category.id)
+
+async def create_subcategory(db: AsyncSession, subcategory_data: subcategory_schema):
     db_subcategory = Subcategory(**subcategory_data.model_dump())
     db.add(db_subcategory)
-    db.commit()
-    db.refresh(db_subcategory)
+    await db.commit()
+    category_cache.invalidate()
+    await db.refresh(db_subcategory)
     return db_subcategory
 
-def update_category(db: Session, category_data: category_schema):
-    db_category = Category(**category_data.model_dump())
-    db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
-    return db_category
+async def update_category(db: AsyncSession, category_id: int, category_data: category_schema):
+    db_category = await db.get(Category, category_id)
+    if not db_category:
+        return None
+    for field, value in category_data.model_dump(exclude_unset=True).items():
+        setattr(db_category, field, value)
+    await db.commit()
+    category_cache.invalidate()
+    return await category_by_id(db, category_id)
 
-def update_subcategory(db: Session, subcategory_data: subcategory_schema):
-    db_subcategory = Subcategory(**subcategory_data.model_dump())
-    db.add(db_subcategory)
-    db.commit()
-    db.refresh(db_subcategory)
+async def update_subcategory(db: AsyncSession, subcategory_id: int, subcategory_data: subcategory_schema):
+    db_subcategory = await db.get(Subcategory, subcategory_id)
+    if not db_subcategory:
+        return None
+    for field, value in subcategory_data.model_dump(exclude_unset=True).items():
+        setattr(db_subcategory, field, value)
+    await db.commit()
+    category_cache.invalidate()
+    await db.refresh(db_subcategory)
     return db_subcategory
 
-def delete_category(db: Session, category_id: int):
-    db_category = Category(**category_data.model_dump())
-    db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+async def delete_category(db: AsyncSession, category_id: int):
+    # loaded with its subcategories: the response shows what was deleted
+    db_category = await category_by_id(db, category_id)
+    if not db_category:
+        return None
+    await db.delete(db_category)
+    await db.commit()
+    category_cache.invalidate()
     return db_category
 
-def delete_subcategory(db: Session, subcategory_id: int):
-    db_subcategory = Subcategory(**subcategory_data.model_dump())
-    db.add(db_subcategory)
-    db.commit()
-    db.refresh(db_subcategory)
+async def delete_subcategory(db: AsyncSession, subcategory_id: int):
+    db_subcategory = await db.get(Subcategory, subcategory_id)
+    if not db_subcategory:
+        return None
+    await db.delete(db_subcategory)
+    await db.commit()
+    category_cache.invalidate()
     return db_subcategory
 
-def all_categories(db: Session):
-    return db.query(Category).all()
+async def all_categories(db: AsyncSession):
+    # subcategories are part of the response schema, load them up front (no lazy IO under asyncio)
+    return (await db.execute(select(Category).options(selectinload(Category.subcategories)))).scalars().all()
 
-def category_by_id(db: Session, category_id: int):
+async def category_by_id(db: AsyncSession, category_id: int):
    #id,name and subcategories(name, id)
-   return db.query(Category).filter(Category.id == category_id).first()
+   return (await db.execute(
+       select(Category)
+       .options(selectinload(Category.subcategories))
+       .filter(Category.id == category_id)
+       .execution_options(populate_existing=True)
+   )).scalars().first()
 
-def create_subcategory_with_category_id(db: Session, subcategory_data: subcategory_schema, category_id: int):
+async def create_subcategory_with_category_id(db: AsyncSession, subcategory_data: subcategory_schema, category_id: int):
     #if category_id is not valid raise error
     db_subcategory = Subcategory(**subcategory_data.model_dump())
     db_subcategory.category_id = category_id
     db.add(db_subcategory)
-    db.commit()
-    db.refresh(db_subcategory)
-    return db_subcategory   
\ No newline at end of file
+    await db.commit()
+    category_cache.invalidate()
+    await db.refresh(db_subcategory)
+    return db_subcategory
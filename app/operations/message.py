@@ -1,17 +1,77 @@
-
+from app.core.chat_bus import chat_bus
+from app.core.message_cache import message_cache
+from app.core.message_writer import lock_tickets
+from app.database import AsyncSessionLocal
 from app.models.message import Message
-from sqlalchemy.orm import Session
+from app.models.user import User
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.messages import MessageCreate
 
-# get old messages for ticket_id 
-def get_old_messages_for_ticket_id(db: Session, ticket_id: int):
-    return db.query(Message).filter(Message.ticket_id == ticket_id).all()
+# History rows are read as plain tuples with the sender's name joined in, not
+# as ORM objects: a window is one index range scan on (ticket_id, id). A
+# ticket's ids increase in commit order (app/core/message_writer.py takes the
+# ticket's lock before inserting), so nothing commits later with an id below
+# one already read, and after_id resumes without a gap.
+
+def _history(ticket_id: int):
+    return (
+        select(Message.id, Message.ticket_id, Message.sender_id, User.name.label("sender_name"),
+               Message.content, Message.timestamp)
+        .join(User, User.id == Message.sender_id)
+        .filter(Message.ticket_id == ticket_id)
+    )
+
+async def _read_window(db: AsyncSession, ticket_id: int, before_id: int | None, after_id: int | None, limit: int):
+    query = _history(ticket_id)
+    if after_id is not None:
+        query = query.filter(Message.id > after_id).order_by(Message.id)
+    else:
+        if before_id is not None:
+            query = query.filter(Message.id < before_id)
+        query = query.order_by(Message.id.desc())
+    # one extra row tells whether there is more
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return (rows if after_id is not None else rows[::-1]), has_more
+
+# a window of a ticket's messages, oldest first: (rows, has_more)
+# - after_id: the first `limit` messages after it (has_more: there are later ones)
+# - otherwise: the last `limit` messages, before before_id if given (has_more: there are earlier ones)
+# Tickets with a websocket on this worker are served from app/core/message_cache.py when it holds the window.
+async def get_old_messages_for_ticket_id(db: AsyncSession, ticket_id: int, before_id: int | None = None,
+                                         after_id: int | None = None, limit: int = 100):
+    if not chat_bus.listening(ticket_id):
+        return await _read_window(db, ticket_id, before_id, after_id, limit)
+    cached = message_cache.window(ticket_id, before_id=before_id, after_id=after_id, limit=limit)
+    if cached is not None:
+        return cached
+    if before_id is not None or after_id is not None or not message_cache.enabled:
+        return await _read_window(db, ticket_id, before_id, after_id, limit)
+    # first read of the latest messages: fill the cache, from the primary (a replica may lag behind the deliveries)
+    message_cache.begin_fill(ticket_id)
+    try:
+        async with AsyncSessionLocal() as primary:
+            rows, has_more = await _read_window(primary, ticket_id, None, None, max(limit, message_cache.per_ticket))
+    except BaseException:
+        message_cache.drop(ticket_id)
+        raise
+    message_cache.fill(ticket_id, rows, complete=not has_more)
+    return rows[-limit:], has_more or len(rows) > limit
+
+# every message after after_id, oldest first, fetched from a server side cursor in chunks
+async def stream_messages_for_ticket_id(db: AsyncSession, ticket_id: int, after_id: int = 0, chunk_size: int = 1000):
+    query = _history(ticket_id).filter(Message.id > after_id).order_by(Message.id)
+    result = await db.stream(query.execution_options(yield_per=chunk_size))
+    async for row in result:
+        yield row
 
 # create message
-def create_message(db: Session, message_data: MessageCreate):
+async def create_message(db: AsyncSession, message_data: MessageCreate):
+    await lock_tickets(db, {message_data.ticket_id})
     db_message = Message(**message_data.model_dump())
     db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
+    await db.commit()
+    await db.refresh(db_message)
     return db_message
-
@@ -0,0 +1,47 @@
+# Priority rule operations, every committed change recompiles the scorer (app/core/priority_rules.py)
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.core.priority_rules import priority_rules
+from app.models.priority_rule import PriorityRule
+from app.schemas.priority_rule import PriorityRuleCreate, PriorityRuleUpdate, ScoreItem
+
+async def get_rules(db: AsyncSession):
+    return (await db.execute(select(PriorityRule).order_by(PriorityRule.priority, PriorityRule.keyword))).scalars().all()
+
+async def create_rule(db: AsyncSession, rule_data: PriorityRuleCreate):
+    db_rule = PriorityRule(**rule_data.model_dump())
+    db.add(db_rule)
+    await db.commit()
+    priority_rules.invalidate()
+    await db.refresh(db_rule)
+    return db_rule
+
+async def update_rule(db: AsyncSession, rule_id: int, rule_data: PriorityRuleUpdate):
+    db_rule = await db.get(PriorityRule, rule_id)
+    if not db_rule:
+        return None
+    for field, value in rule_data.model_dump().items():
+        setattr(db_rule, field, value)
+    await db.commit()
+    priority_rules.invalidate()
+    await db.refresh(db_rule)
+    return db_rule
+
+async def delete_rule(db: AsyncSession, rule_id: int):
+    db_rule = await db.get(PriorityRule, rule_id)
+    if not db_rule:
+        return None
+    await db.delete(db_rule)
+    await db.commit()
+    priority_rules.invalidate()
+    return db_rule
+
+async def score_tickets(tickets: list[ScoreItem]):
+    """Scores a batch with the current rules, in request order."""
+    scorer = await priority_rules.get()
+    # thousands of tickets are a noticeable slice of CPU, keep the event loop free
+    return await run_in_threadpool(
+        scorer.score_many, [(ticket.title, ticket.initial_description) for ticket in tickets]
+    )
@@ -0,0 +1,79 @@
+"""
+Ticket search.
+
+Backed by the indexes of migration 0003:
+- ticket_uid (unique btree): exact lookup fast path, e.g. "TICKET-0CXH4KT1MA06G"
+- tickets.search_vector (GIN tsvector over title + description): ranked full text
+- tickets.title, users.name, users.email (GIN pg_trgm): substring matches (ILIKE)
+Results are ordered by relevance, then newest first, and paginated.
+"""
+
+import re
+
+from sqlalchemy import case, func, or_, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ticket import Ticket, TicketStatus
+from app.models.user import User
+from app.schemas.ids import MAX_DB_ID
+
+TICKET_UID_PATTERN = re.compile(r"^TICKET-[0-9A-Z]+$", re.IGNORECASE)
+SEARCH_CONFIG = "english"  # must match the generated search_vector column
+
+
+def _like_pattern(search_query: str) -> str:
+    escaped = search_query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def search_tickets(
+    db: AsyncSession,
+    search_query: str,
+    skip: int = 0,
+    limit: int = 50,
+    statuses: list[TicketStatus] | None = None,
+    options: tuple = (),
+):
+    """Ranked ticket search over uid, id, title, description and the creator's name / email."""
+    search_query = search_query.strip()
+    if not search_query:
+        return []
+
+    query = select(Ticket).options(*options)
+    if statuses:
+        query = query.filter(Ticket.status.in_(statuses))
+
+    # exact fast path: a ticket uid is a single unique index probe
+    if TICKET_UID_PATTERN.match(search_query):
+        return (await db.execute(query.filter(Ticket.ticket_uid == search_query.upper()))).scalars().all()
+
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, search_query)
+    like = _like_pattern(search_query)
+    # one branch per index; a plain OR across tickets and users would fall back to a sequential scan
+    branches = [
+        select(Ticket.id).filter(Ticket.search_vector.op("@@")(ts_query)),
+        select(Ticket.id).filter(Ticket.title.ilike(like, escape="\\")),
+        select(Ticket.id).join(User, Ticket.user_id == User.id).filter(
+            or_(User.name.ilike(like, escape="\\"), User.email.ilike(like, escape="\\"))
+        ),
+    ]
+    rank = func.greatest(
+        func.ts_rank_cd(Ticket.search_vector, ts_query),
+        func.similarity(Ticket.title, search_query),
+        func.similarity(User.name, search_query),
+        func.similarity(User.email, search_query),
+    )
+    ordering = [rank.desc(), Ticket.id.desc()]
+    if search_query.isascii() and search_query.isdigit() and int(search_query) <= MAX_DB_ID:
+        # a bare number is most likely a ticket id (a longer one cannot be, and would overflow the int4 parameter)
+        branches.append(select(Ticket.id).filter(Ticket.id == int(search_query)))
+        ordering.insert(0, case((Ticket.id == int(search_query), 1), else_=0).desc())
+
+    query = (
+        query.join(User, Ticket.user_id == User.id)
+        .filter(Ticket.id.in_(union(*branches)))
+        .order_by(*ordering)
+        .offset(skip)
+        .limit(limit)
+    )
+    return (await db.execute(query)).scalars().all()
@@ -0,0 +1,161 @@
+"""
+SLA rollups: first-response and resolution time percentiles.
+
+Each ticket gets first_response_at (first message from an agent) and
+resolved_at (first move to resolved / closed) exactly once. At that moment the
+duration since the ticket's creation is added to sla_rollups, in the same
+transaction, as +1 in its duration bin of the hour and of the day, per agent
+and category. Percentiles over any range are then summed from the histogram
+rows, never from messages or tickets.
+
+Bins are a quarter of a power of two wide (bin b >= 1 holds [2^((b-1)/4),
+2^(b/4)) seconds, bin 0 is under a second), so a reported percentile is within
+~9% of the exact one, and a year fits in 100 bins.
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.sla_rollup import SlaGranularity, SlaMetric, SlaRollup
+from app.models.ticket import Ticket
+
+BINS_PER_DOUBLING = 4
+MAX_BIN = 127
+PERCENTILES = (50, 90, 99)
+GROUP_BY = ("none", "agent", "category", "bucket")
+
+
+def bin_of(seconds: float) -> int:
+    if seconds < 1:
+        return 0
+    return min(1 + math.floor(math.log2(seconds) * BINS_PER_DOUBLING), MAX_BIN)
+
+
+def bin_value(bin: int) -> float:
+    """Representative duration of a bin (its geometric middle), in seconds."""
+    if bin == 0:
+        return 0.5
+    return 2 ** ((bin - 0.5) / BINS_PER_DOUBLING)
+
+
+def _bucket_start(at: datetime, granularity: SlaGranularity) -> datetime:
+    at = at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(hour=0) if granularity == SlaGranularity.day else at
+
+
+async def _add(db: AsyncSession, metric: SlaMetric, at: datetime, seconds: float,
+               agent_id: Optional[int], category_id: int):
+    bin = bin_of(max(seconds, 0))
+    insert = pg_insert(SlaRollup).values([
+        {
+            "metric": metric, "granularity": granularity, "bucket_start": _bucket_start(at, granularity),
+            "agent_id": agent_id or 0, "category_id": category_id, "bin": bin, "tickets": 1,
+        }
+        for granularity in (SlaGranularity.hour, SlaGranularity.day)
+    ])
+    await db.execute(insert.on_conflict_do_update(
+        index_elements=[SlaRollup.metric, SlaRollup.granularity, SlaRollup.bucket_start,
+                        SlaRollup.agent_id, SlaRollup.category_id, SlaRollup.bin],
+        set_={"tickets": SlaRollup.tickets + 1},
+    ))
+
+
+async def record_first_response(db: AsyncSession, ticket_id: int, agent_id: int):
+    """
+    Stamps the ticket's first response if it has none yet; committed by the
+    caller. A conditional UPDATE, so two agents answering at once count once.
+    """
+    row = (await db.execute(
+        update(Ticket)
+        .filter(Ticket.id == ticket_id, Ticket.first_response_at.is_(None))
+        .values(first_response_at=func.localtimestamp())
+        .returning(Ticket.created_at, Ticket.first_response_at, Ticket.category_id)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if row is not None:
+        await _add(db, SlaMetric.first_response, row.first_response_at,
+                   (row.first_response_at - row.created_at).total_seconds(), agent_id, row.category_id)
+
+
+async def record_resolution(db: AsyncSession, ticket: Ticket, at: datetime):
+    """
+    Stamps the first resolution of a ticket whose row the caller has locked;
+    later resolutions (after a reopen) do not count again. Committed by the caller.
+    """
+    if ticket.resolved_at is not None:
+        return
+    ticket.resolved_at = at
+    await _add(db, SlaMetric.resolution, at, (at - ticket.created_at).total_seconds(),
+               ticket.agent_id, ticket.category_id)
+
+
+def _percentiles(histogram: dict[int, int]) -> dict:
+    total = sum(histogram.values())
+    result = {"tickets": total}
+    cumulative, bins = 0, iter(sorted(histogram.items()))
+    bin = None
+    for percentile in PERCENTILES:
+        rank = math.ceil(total * percentile / 100)
+        while cumulative < rank:
+            bin, count = next(bins)
+            cumulative += count
+        result[f"p{percentile}_seconds"] = round(bin_value(bin), 1)
+    return result
+
+
+async def get_percentiles(
+    db: AsyncSession,
+    metric: SlaMetric,
+    granularity: SlaGranularity,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    group_by: str = "none",
+    agent_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+) -> list[dict]:
+    """
+    p50/p90/p99 of the events in [since, until), per group. Buckets are whole
+    hours / days; by default the last 24 hours (hourly) or 30 days (daily).
+    """
+    if until is None:
+        until = (await db.execute(select(func.localtimestamp()))).scalar()
+    if since is None:
+        since = until - (timedelta(hours=24) if granularity == SlaGranularity.hour else timedelta(days=30))
+    group_column = {
+        "agent": SlaRollup.agent_id,
+        "category": SlaRollup.category_id,
+        "bucket": SlaRollup.bucket_start,
+    }.get(group_by)
+    columns = [SlaRollup.bin, func.sum(SlaRollup.tickets)]
+    if group_column is not None:
+        columns.insert(0, group_column)
+    query = (
+        select(*columns)
+        .filter(
+            SlaRollup.metric == metric,
+            SlaRollup.granularity == granularity,
+            SlaRollup.bucket_start >= _bucket_start(since, granularity),
+            SlaRollup.bucket_start < until,
+        )
+        .group_by(*columns[:-1])
+    )
+    if agent_id is not None:
+        query = query.filter(SlaRollup.agent_id == agent_id)
+    if category_id is not None:
+        query = query.filter(SlaRollup.category_id == category_id)
+
+    histograms = defaultdict(dict)
+    for row in (await db.execute(query)).all():
+        *group, bin, tickets = row
+        histograms[group[0] if group else None][bin] = tickets
+    return [
+        {group_by: group, **_percentiles(histogram)} if group_by != "none" else _percentiles(histogram)
+        for group, histogram in sorted(histograms.items(), key=lambda item: (item[0] is None, item[0]))
+    ]
+
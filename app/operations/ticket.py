@@ -1,9 +1,10 @@
-from sqlalchemy.orm import Session,joinedload
-from sqlalchemy import func, or_, String
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, raiseload
+from sqlalchemy import func, or_, select, String
 from app.models import user as user_model
 from app.models.ticket import Ticket, TicketPriority, TicketStatus
 from app.models.ticket_transfer import TicketTransfer, TransferStatus
-import random 
 
 from app.models.ticket import Ticket as ticket_model
 from app.models.user import User
@@ -11,142 +12,191 @@ from app.schemas.ticket import Ticket as ticket_schema, DashboardStats
 from app.models.category import Category
 from app.models.subcategory import Subcategory
 from app.models.ticket_note import TicketNote
+from app.operations import search
+from app.core.pagination import fetch_page
+from app.core.agent_load import ACTIVE_STATUSES, agent_load_index
+from app.core.priority_rules import priority_rules
+from app.core.ticket_uid import ticket_uid_generator
+from app.operations import assignment, sla, ticket_stats
 from typing import Optional
 
 
+# Loader profiles: exactly the relationships each response schema reads, loaded
+# up front so a page costs a fixed number of queries whatever its size (a lazy
+# load would be one query per row, and is not available under asyncio anyway).
+# raiseload("*") turns any relationship a schema starts reading without its
+# profile being updated into an error instead of a silent N+1.
 
-def get_ticket(db: Session, ticket_id: int):
+# schemas.ticket.TicketOut (ticket lists): many-to-ones joined in, one query
+LOAD_TICKET_OUT = (
+    joinedload(ticket_model.user),
+    joinedload(ticket_model.agent),
+    joinedload(ticket_model.category).load_only(Category.id, Category.name),
+    joinedload(ticket_model.subcategory).load_only(Subcategory.id, Subcategory.name),
+    raiseload("*"),
+)
+
+# schemas.ticket.Ticket (single ticket, search results): plus the category's
+# subcategories, one extra SELECT ... IN for the whole result
+LOAD_TICKET = (
+    joinedload(ticket_model.user),
+    joinedload(ticket_model.agent),
+    joinedload(ticket_model.category).selectinload(Category.subcategories),
+    joinedload(ticket_model.subcategory),
+    raiseload("*"),
+)
+
+
+async def get_ticket(db: AsyncSession, ticket_id: int):
     """Gets a single ticket by its ID."""
-    return db.query(ticket_model).filter(ticket_model.id == ticket_id).first()
-    
+    return (await db.execute(
+        select(ticket_model)
+        .options(*LOAD_TICKET)
+        .filter(ticket_model.id == ticket_id)
+        .execution_options(populate_existing=True)
+    )).scalars().first()
 
-def get_transfer_request(db: Session, ticket_transfer_id: int):
-    return db.query(TicketTransfer).filter(ticket_transfer_id == TicketTransfer.id).first()
 
-def get_transfer_requests(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(TicketTransfer).offset(skip).limit(limit).all()
+async def get_transfer_request(db: AsyncSession, ticket_transfer_id: int):
+    return await db.get(TicketTransfer, ticket_transfer_id)
+
+async def get_transfer_requests(db: AsyncSession, cursor: str | None = None, limit: int = 100):
+    """Transfer requests, newest first, one keyset page at a time."""
+    return await fetch_page(
+        db, select(TicketTransfer), (TicketTransfer.requested_at, TicketTransfer.id), cursor, limit
+    )
 
-def get_tickets(db: Session, user_id: int = None, agent_id: int = None, skip: int = 0, limit: int = 100):
+async def get_tickets(db: AsyncSession, user_id: int = None, agent_id: int = None, cursor: str | None = None, limit: int = 100):
     """
-    Gets a list of tickets.
+    Gets a page of tickets, newest first, and the cursor of the next page.
     - If user_id is provided, filters for that user's created tickets.
     - If agent_id is provided, filters for that agent's assigned tickets.
     - If neither is provided, returns all tickets (for admins).
     """
-    query = db.query(ticket_model)
-    
+    query = select(ticket_model).options(*LOAD_TICKET_OUT)
+
     if user_id:
         query = query.filter(ticket_model.user_id == user_id)
-    
+
     if agent_id:
         query = query.filter(ticket_model.agent_id == agent_id)
-        
-    return query.offset(skip).limit(limit).all()
 
-def update_ticket_status(db: Session, db_ticket: ticket_model, status: TicketStatus):
-    """Updates the status of a given ticket."""
-    db_ticket.status = status
-    db.commit()
-    db.refresh(db_ticket)
-    return db_ticket
-
-
-def get_dashboard_stats(db: Session) -> DashboardStats:
-    """Calculates and returns dashboard statistics."""
-    total_tickets = db.query(func.count(ticket_model.id)).scalar()
-    
-    resolved_statuses = [TicketStatus.resolved, TicketStatus.closed]
-    resolved_tickets = db.query(func.count(ticket_model.id)).filter(ticket_model.status.in_(resolved_statuses)).scalar()
-    
-    pending_tickets = total_tickets - resolved_tickets
-    
-    return DashboardStats(
-        total_tickets=total_tickets,
-        resolved_tickets=resolved_tickets,
-        pending_tickets=pending_tickets
+    return await fetch_page(db, query, (ticket_model.created_at, ticket_model.id), cursor, limit)
+
+# the users a ticket embeds (TicketOut.user / .agent): a rename changes the ticket's representation
+_creator, _agent = aliased(User), aliased(User)
+
+async def get_tickets_version(db: AsyncSession, user_id: int = None, agent_id: int = None):
+    """
+    (count, sum of row hashes) of the tickets get_tickets lists with the same
+    filters: changes with any of them. Each row hashes its id and the
+    updated_at of the ticket and of its creator and agent, so an update shows
+    even when it commits after a later one (updated_at is the transaction's
+    start time, max(updated_at) would not move), and so does a change to an
+    embedded user.
+    """
+    row_hash = func.hashtextextended(func.concat(
+        ticket_model.id, " ", ticket_model.updated_at, " ", _creator.updated_at, " ", _agent.updated_at
+    ), 0)
+    query = (
+        select(func.count(), func.sum(row_hash))
+        .select_from(ticket_model)
+        .outerjoin(_creator, _creator.id == ticket_model.user_id)
+        .outerjoin(_agent, _agent.id == ticket_model.agent_id)
     )
+    if user_id:
+        query = query.filter(ticket_model.user_id == user_id)
+    if agent_id:
+        query = query.filter(ticket_model.agent_id == agent_id)
+    return tuple((await db.execute(query)).one())
+
+async def get_ticket_version(db: AsyncSession, ticket_id: int):
+    """
+    The (user_id, agent_id, updated_at, user_updated_at, agent_updated_at) of a
+    ticket, for access checks and its ETag; None if it does not exist.
+    """
+    return (await db.execute(
+        select(ticket_model.user_id, ticket_model.agent_id, ticket_model.updated_at,
+               _creator.updated_at.label("user_updated_at"), _agent.updated_at.label("agent_updated_at"))
+        .outerjoin(_creator, _creator.id == ticket_model.user_id)
+        .outerjoin(_agent, _agent.id == ticket_model.agent_id)
+        .filter(ticket_model.id == ticket_id)
+    )).first()
+
+async def _set_status(db: AsyncSession, db_ticket: ticket_model, status: TicketStatus):
+    # the ticket row lock makes concurrent status changes count the agent's load once
+    locked = (await db.execute(
+        select(ticket_model, func.localtimestamp())
+        .filter(ticket_model.id == db_ticket.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )).one()
+    db_ticket, now = locked
+    old_status, priority, category_id, agent_id = db_ticket.status, db_ticket.priority, db_ticket.category_id, db_ticket.agent_id
+    delta = (status in ACTIVE_STATUSES) - (old_status in ACTIVE_STATUSES)
+    loads = await assignment.adjust_loads(db, {agent_id: delta})
+    db_ticket.status = status
+    if status in ticket_stats.RESOLVED_STATUSES:
+        await sla.record_resolution(db, db_ticket, now)
+    await ticket_stats.record(db, ticket_stats.moved(
+        ticket_stats.stat_key(old_status, priority, category_id, agent_id),
+        ticket_stats.stat_key(status, priority, category_id, agent_id),
+    ))
+    await db.commit()
+    agent_load_index.set_loads(loads)
+    return await get_ticket(db, db_ticket.id)
+
+async def update_ticket_status(db: AsyncSession, db_ticket: ticket_model, status: TicketStatus):
+    """Updates the status of a given ticket."""
+    return await _set_status(db, db_ticket, status)
+
+
+async def get_dashboard_stats(db: AsyncSession) -> DashboardStats:
+    """Dashboard statistics, read from the ticket_stats counters (app/operations/ticket_stats.py)."""
+    return DashboardStats(**await ticket_stats.get_dashboard(db))
     # Add these imports at the top of app/operations/ticket.py
-# Needed for random UID generation
 
 # ... (keep existing functions like get_ticket, get_tickets, etc.) ...
 
 def _generate_ticket_uid() -> str:
-    """Generates a simple, user-friendly unique ticket ID."""
-    # In a real-world app, you might want a more robust system
-    # like combining timestamp and a random component.
-    return f"TICKET-{random.randint(100000, 999999)}"
+    """Time ordered, unique across workers, see app/core/ticket_uid.py."""
+    return ticket_uid_generator.next_uid()
 
-def _score_priority(title: str, description: str) -> TicketPriority:
+async def _score_priority(title: str, description: str) -> TicketPriority:
     """
     ALGORITHM #1: Keyword-Based Priority Scoring.
-    Scans ticket content for keywords to automatically set priority.
+    Matches ticket content against the priority_rules table in a single pass,
+    see app/core/priority_rules.py. Most severe match wins, medium by default.
     """
-    content = f"{title.lower()} {description.lower()}"
-    
-    # Define keywords and their corresponding priorities
-    if any(keyword in content for keyword in ['outage', 'critical', 'down', 'urgent', 'broken']):
-        return TicketPriority.urgent
-    elif any(keyword in content for keyword in ['error', 'fail', 'slow', 'no internet']):
-        return TicketPriority.high
-    elif any(keyword in content for keyword in ['question', 'inquiry', 'how to', 'request']):
-        return TicketPriority.low
-    else:
-        return TicketPriority.medium # Default priority
-
-def _find_best_agent(db: Session, category_id: int) -> Optional[int]:
+    return (await priority_rules.get()).score(title, description)
+
+async def _find_best_agent(db: AsyncSession, category_id: int) -> Optional[tuple[int, int]]:
     """
     ALGORITHM #2: Least Connections Agent Assignment.
-    Finds the agent assigned to the category with the fewest active tickets.
+    Charges the new ticket to the agent of the category with the fewest active
+    tickets: (agent_id, its new active count). One locking UPDATE, safe under
+    concurrent requests and workers, see app/operations/assignment.py.
     """
-    # Find agents assigned to this category
-    assigned_agents_query = db.query(user_model.User.id).join(
-        user_model.User.assigned_categories
-    ).filter(
-        user_model.User.role == user_model.UserRole.agent,
-        user_model.User.assigned_categories.any(id=category_id)
-    )
-    
-    assigned_agent_ids = [agent_id for agent_id, in assigned_agents_query.all()]
-    
-    if not assigned_agent_ids:
-        return None # No agent is available for this category
-
-    # Find the agent among them with the minimum number of active tickets
-    # Active statuses are 'assigned' and 'in_progress'
-    active_statuses = [TicketStatus.assigned, TicketStatus.in_progress]
-    
-    result = db.query(
-        ticket_model.agent_id, 
-        func.count(ticket_model.id).label('active_tickets')
-    ).filter(
-        ticket_model.agent_id.in_(assigned_agent_ids),
-        ticket_model.status.in_(active_statuses)
-    ).group_by(ticket_model.agent_id).order_by('active_tickets').first()
-    
-    if result:
-        # An agent with active tickets was found, return the one with the least
-        return result.agent_id
-    else:
-        # No agents have active tickets, so just pick one from the available list
-        return assigned_agent_ids[0]
-
-def create_ticket(db: Session, ticket_data: ticket_schema, user_id: int):
+    return await assignment.claim_agent(db, category_id)
+
+async def create_ticket(db: AsyncSession, ticket_data: ticket_schema, user_id: int):
     """
     Creates a new ticket, scores its priority, and assigns it to the best agent.
     """
 
     # if category and or sub category are not exist raise error
-  
-    
+
+
     # 1. Score Priority
-    priority = _score_priority(ticket_data.title, ticket_data.initial_description)
-    
+    priority = await _score_priority(ticket_data.title, ticket_data.initial_description)
+
     # 2. Find Best Agent
-    best_agent_id = _find_best_agent(db, ticket_data.category_id)
-    
+    claim = await _find_best_agent(db, ticket_data.category_id)
+    best_agent_id = claim[0] if claim else None
+
     # Determine initial status based on agent availability
     status = TicketStatus.assigned if best_agent_id else TicketStatus.open
-    
+
     # 3. Create Ticket Record
     db_ticket = ticket_model(
         **ticket_data.model_dump(),
@@ -157,13 +207,21 @@ def create_ticket(db: Session, ticket_data: ticket_schema, user_id: int):
         status=status,
     )
 
-    
+
     db.add(db_ticket)
-    db.commit()
-    db.refresh(db_ticket)
-    return db_ticket
+    await ticket_stats.record(db, {ticket_stats.stat_key(status, priority, ticket_data.category_id, best_agent_id): 1})
+    # commits the agent_capacity increment with the ticket, and releases its row lock
+    try:
+        await db.commit()
+    except IntegrityError:
+        # e.g. the category was deleted by another worker after this one cached it
+        await db.rollback()
+        raise
+    if claim:
+        agent_load_index.set_loads({best_agent_id: claim[1]})
+    return await get_ticket(db, db_ticket.id)
 
-def create_ticket_transfer_request(db: Session, db_ticket: ticket_model, from_agent_id: int, to_agent_id: int, reason: str):
+async def create_ticket_transfer_request(db: AsyncSession, db_ticket: ticket_model, from_agent_id: int, to_agent_id: int, reason: str):
     """Creates a ticket transfer request record."""
     transfer_request = TicketTransfer(
         ticket_id=db_ticket.id,
@@ -173,64 +231,58 @@ def create_ticket_transfer_request(db: Session, db_ticket: ticket_model, from_ag
         status= TransferStatus.pending
     )
     db.add(transfer_request)
-    db.commit()
-    db.refresh(transfer_request)
+    await db.commit()
+    await db.refresh(transfer_request)
     return transfer_request
 
-def approve_ticket_transfer(db: Session, transfer_request: TicketTransfer):
-    db.add
-    db.commit()
-    db.refresh(transfer_request)
+async def approve_ticket_transfer(db: AsyncSession, transfer_request: TicketTransfer):
+    """Commits the approval and hands the ticket over to the target agent."""
+    db_ticket = await db.get(
+        ticket_model, transfer_request.ticket_id, with_for_update=True, populate_existing=True
+    )
+    from_agent_id, old_status = db_ticket.agent_id, db_ticket.status
+    before = ticket_stats.stat_key(old_status, db_ticket.priority, db_ticket.category_id, from_agent_id)
+    db_ticket.agent_id = transfer_request.to_agent_id
+    if db_ticket.status == TicketStatus.open:
+        db_ticket.status = TicketStatus.assigned
+    deltas = {}
+    if old_status in ACTIVE_STATUSES:
+        deltas[from_agent_id] = deltas.get(from_agent_id, 0) - 1
+    if db_ticket.status in ACTIVE_STATUSES:
+        deltas[db_ticket.agent_id] = deltas.get(db_ticket.agent_id, 0) + 1
+    loads = await assignment.adjust_loads(db, deltas)
+    await ticket_stats.record(db, ticket_stats.moved(
+        before, ticket_stats.stat_key(db_ticket.status, db_ticket.priority, db_ticket.category_id, db_ticket.agent_id)
+    ))
+    await db.commit()
+    agent_load_index.set_loads(loads)
+    await db.refresh(transfer_request)
     return transfer_request
 
 from sqlalchemy import or_
 
-def get_all_reopen_requests(db: Session, search_query: str | None = None):
-    query = db.query(Ticket).filter(Ticket.status == TicketStatus.requested_reopen)
-
+async def get_all_reopen_requests(db: AsyncSession, search_query: str | None = None, skip: int = 0, limit: int = 100):
     if search_query:
-        search = f"%{search_query}%"  # for ILIKE search
-        query = query.join(Ticket.user).filter(
-            or_(
-                Ticket.id.cast(String).ilike(search),
-                Ticket.title.ilike(search),
-                User.name.ilike(search),
-                User.email.ilike(search)
-            )
+        return await search.search_tickets(
+            db, search_query, skip=skip, limit=limit, statuses=[TicketStatus.requested_reopen]
         )
 
-    return query.all()
-
+    query = select(Ticket).filter(Ticket.status == TicketStatus.requested_reopen)
+    return (await db.execute(query.order_by(Ticket.id.desc()).offset(skip).limit(limit))).scalars().all()
 
-def request_reopen_ticket(db: Session, ticket: Ticket):
-    ticket.status = TicketStatus.requested_reopen
-    db.commit()
-    db.refresh(ticket)
-    return ticket
 
-def search_tickets(db: Session, search_query: str):
+async def request_reopen_ticket(db: AsyncSession, ticket: Ticket):
+    return await _set_status(db, ticket, TicketStatus.requested_reopen)
 
-    return (
-        db.query(Ticket)
-        .join(User, Ticket.user_id == User.id)  # join with user table
-        .options(joinedload(Ticket.user))       # eager load user data
-        .filter(
-            or_(
-                Ticket.title.ilike(f"%{search_query}%"),
-                User.name.ilike(f"%{search_query}%")
-            )
-        )
-        .all()
-    )
+async def search_tickets(db: AsyncSession, search_query: str, skip: int = 0, limit: int = 50):
+    """Ranked search, see app/operations/search.py."""
+    return await search.search_tickets(db, search_query, skip=skip, limit=limit, options=LOAD_TICKET)
 
-def accept_reopen_ticket(db: Session, ticket: Ticket):
-    ticket.status = TicketStatus.reopened
-    db.commit()
-    db.refresh(ticket)
-    return ticket
+async def accept_reopen_ticket(db: AsyncSession, ticket: Ticket):
+    return await _set_status(db, ticket, TicketStatus.reopened)
 
-def create_ticket_note(db: Session, ticket_note: TicketNote):
+async def create_ticket_note(db: AsyncSession, ticket_note: TicketNote):
     db.add(ticket_note)
-    db.commit()
-    db.refresh(ticket_note)
-    return ticket_note
\ No newline at end of file
+    await db.commit()
+    await db.refresh(ticket_note)
+    return ticket_note
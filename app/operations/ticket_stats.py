@@ -0,0 +1,130 @@
+"""
+Dashboard counters: tickets per (status, priority, category, agent).
+
+Every operation that inserts a ticket or moves it between statuses or agents
+adds its +1 / -1 to the matching ticket_stats rows in its own transaction
+(record), so the counters commit or roll back with the tickets. The dashboard
+sums that table, whose size depends on the number of categories and agents,
+not on the number of tickets.
+
+Rows are upserted in a fixed key order, so two transactions touching the same
+rows cannot deadlock. Anything that changes tickets behind the operations'
+back (manual SQL, a failed deploy) is corrected by reconcile, run from
+POST /admin/dashboard/reconcile or python -m app.cli.reconcile_ticket_stats.
+"""
+
+from collections import Counter
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.models.ticket_stat import TicketStat
+
+RESOLVED_STATUSES = (TicketStatus.resolved, TicketStatus.closed)
+
+StatKey = tuple[TicketStatus, TicketPriority, int, int]
+
+
+def stat_key(status: TicketStatus, priority: TicketPriority, category_id: int, agent_id: Optional[int]) -> StatKey:
+    return (status, priority, category_id, agent_id or 0)
+
+
+def _sort_key(key: StatKey):
+    status, priority, category_id, agent_id = key
+    return (status.value, priority.value, category_id, agent_id)
+
+
+def moved(before: StatKey, after: StatKey) -> Counter:
+    """Deltas of one ticket changing from before to after."""
+    deltas = Counter()
+    if before != after:
+        deltas[before] -= 1
+        deltas[after] += 1
+    return deltas
+
+
+async def record(db: AsyncSession, deltas: Counter | dict):
+    """Adds deltas {stat_key: change} to the counters; committed by the caller."""
+    rows = [
+        {"status": key[0], "priority": key[1], "category_id": key[2], "agent_id": key[3], "tickets": delta}
+        for key, delta in sorted(deltas.items(), key=lambda item: _sort_key(item[0]))
+        if delta
+    ]
+    if not rows:
+        return
+    insert = pg_insert(TicketStat).values(rows)
+    await db.execute(insert.on_conflict_do_update(
+        index_elements=[TicketStat.status, TicketStat.priority, TicketStat.category_id, TicketStat.agent_id],
+        set_={"tickets": TicketStat.tickets + insert.excluded.tickets},
+    ))
+
+
+async def get_dashboard(db: AsyncSession) -> dict:
+    """Totals and breakdowns, one GROUPING SETS query over ticket_stats."""
+    rows = (await db.execute(
+        select(TicketStat.status, TicketStat.priority, TicketStat.category_id, TicketStat.agent_id,
+               func.sum(TicketStat.tickets))
+        .group_by(func.grouping_sets(TicketStat.status, TicketStat.priority, TicketStat.category_id, TicketStat.agent_id))
+    )).all()
+    by_status, by_priority, by_category, by_agent = {}, {}, {}, {}
+    for status, priority, category_id, agent_id, tickets in rows:
+        # exactly one column is set per grouping set (none of them is nullable)
+        if not tickets:
+            continue
+        if status is not None:
+            by_status[status.value] = tickets
+        elif priority is not None:
+            by_priority[priority.value] = tickets
+        elif category_id is not None:
+            by_category[category_id] = tickets
+        else:
+            by_agent[agent_id] = tickets
+
+    total = sum(by_status.values())
+    resolved = sum(by_status.get(status.value, 0) for status in RESOLVED_STATUSES)
+    return {
+        "total_tickets": total,
+        "resolved_tickets": resolved,
+        "pending_tickets": total - resolved,
+        "unassigned_tickets": by_agent.pop(0, 0),
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "by_category": by_category,
+        "by_agent": by_agent,
+    }
+
+
+def _counted(rows: Iterable) -> dict[StatKey, int]:
+    return {stat_key(status, priority, category_id, agent_id): tickets
+            for status, priority, category_id, agent_id, tickets in rows if tickets}
+
+
+async def reconcile(db: AsyncSession) -> dict:
+    """
+    Recounts tickets and corrects the counters that drifted.
+    SHARE ROW EXCLUSIVE waits for the transactions that already wrote counters
+    and holds off new ones until commit, so the recount and the counters see
+    the same tickets; dashboard reads are not blocked.
+    """
+    await db.execute(text(f"LOCK TABLE {TicketStat.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+    actual = _counted((await db.execute(
+        select(Ticket.status, Ticket.priority, Ticket.category_id, Ticket.agent_id, func.count())
+        .group_by(Ticket.status, Ticket.priority, Ticket.category_id, Ticket.agent_id)
+    )).all())
+    stored = _counted((await db.execute(
+        select(TicketStat.status, TicketStat.priority, TicketStat.category_id, TicketStat.agent_id, TicketStat.tickets)
+    )).all())
+
+    drift = {key: actual.get(key, 0) - stored.get(key, 0) for key in actual.keys() | stored.keys()}
+    drift = {key: delta for key, delta in drift.items() if delta}
+    await record(db, drift)
+    await db.execute(delete(TicketStat).filter(TicketStat.tickets == 0))
+    await db.commit()
+    return {
+        "tickets": sum(actual.values()),
+        "corrected_rows": len(drift),
+        "drift": sum(abs(delta) for delta in drift.values()),
+    }
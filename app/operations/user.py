@@ -1,76 +1,74 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash
+from app.core.password_pool import hash_password
+from app.core.pagination import fetch_page
+from app.core.principal_cache import principal_cache
+from app.core.agent_load import agent_load_index
+from app.operations.assignment import add_agent_capacity
 
-def get_user(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(User, user_id)
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    return (await db.execute(select(User).filter(User.email == email))).scalars().first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+async def get_users(db: AsyncSession, cursor: str | None = None, limit: int = 100):
+    """Users, newest first, one keyset page at a time: (users, next_cursor)."""
+    return await fetch_page(db, select(User), (User.created_at, User.id), cursor, limit)
 
 
-def create_user(db: Session, user: UserCreate):
+async def create_user(db: AsyncSession, user: UserCreate):
     db_user = User(
         name=user.name,
         email=user.email,
-        password_hash=get_password_hash(user.password),
+        password_hash=await hash_password(user.password),
         role=UserRole.user,
         profile_photo_url=user.profile_photo_url
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
-def create_agent(db: Session, user: UserCreate):
+async def create_agent(db: AsyncSession, user: UserCreate):
     db_user = User(
         name=user.name,
         email=user.email,
-        password_hash=get_password_hash(user.password),
+        password_hash=await hash_password(user.password),
         role=UserRole.agent,
         profile_photo_url=user.profile_photo_url
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
-# def create_admin(db: Session, user: UserCreate):
-    db_user = User(
-        name=user.name,
-        email=user.email,
-        password_hash=get_password_hash(user.password),
-        role=UserRole.admin,
-        profile_photo_url=user.profile_photo_url
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.flush()
+    await add_agent_capacity(db, db_user.id)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def update_user(db: Session, user_id: int, user: UserUpdate):
-    db_user = get_user(db, user_id)
+async def update_user(db: AsyncSession, user_id: int, user: UserUpdate):
+    db_user = await get_user(db, user_id)
     if not db_user:
         return None
     if user.name:
         db_user.name = user.name
     if user.password:
-        from app.core.security import get_password_hash
-        db_user.password_hash = get_password_hash(user.password)
+        db_user.password_hash = await hash_password(user.password)
     if user.profile_photo_url:
         db_user.profile_photo_url = user.profile_photo_url
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    principal_cache.invalidate(user_id)
+    await db.refresh(db_user)
     return db_user
 
- 
 
-def delete_user(db: Session, user_id: int):
-    db_user = get_user(db, user_id)
+
+async def delete_user(db: AsyncSession, user_id: int):
+    db_user = await get_user(db, user_id)
     if not db_user:
         return None
-    db.delete(db_user)
-    db.commit()
+    await db.delete(db_user)
+    await db.commit()
+    principal_cache.invalidate(user_id)
+    agent_load_index.remove_agent(user_id)
     return db_user
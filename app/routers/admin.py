@@ -0,0 +1,160 @@
+"""
+Operational endpoints, admin only.
+Counters are per worker process: every uvicorn worker owns its own pools.
+"""
+
+import os
+
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db_pool import pool_status
+from app.core.principal_cache import Principal
+from app.database import async_engine, get_db, get_read_db, replica_engines
+from app.dependencies import get_current_admin
+from app.models.sla_rollup import SlaGranularity, SlaMetric
+from app.operations import bulk_import as bulk_import_ops
+from app.operations import priority_rule as priority_rule_ops
+from app.operations import sla as sla_ops
+from app.operations import ticket as ticket_ops
+from app.operations import ticket_stats
+from app.schemas import admin as admin_schema
+from app.schemas import bulk_import as bulk_import_schema
+from app.schemas.ids import DbId
+from app.schemas import priority_rule as priority_rule_schema
+from app.schemas import sla as sla_schema
+from app.schemas import ticket as ticket_schema
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/db/pool", response_model=admin_schema.DatabasePoolsOut)
+async def read_pool_stats(current_user: Principal = Depends(get_current_admin)):
+    """Checkout, overflow and wait-time counters of the database pools of this worker."""
+    pools = {"primary": pool_status(async_engine.pool)}
+    for index, replica in enumerate(replica_engines):
+        pools[f"replica_{index}"] = pool_status(replica.pool)
+    return {"worker_pid": os.getpid(), "pools": pools}
+
+
+@router.get("/dashboard", response_model=ticket_schema.DashboardStats)
+async def read_dashboard(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_admin),
+):
+    """Ticket totals and breakdowns by status, priority, category and agent."""
+    return await ticket_ops.get_dashboard_stats(db)
+
+
+@router.post("/dashboard/reconcile", response_model=ticket_schema.TicketStatsReconcileOut)
+async def reconcile_dashboard(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_admin),
+):
+    """Recounts the tickets and corrects the dashboard counters that drifted."""
+    return await ticket_stats.reconcile(db)
+
+
+@router.get("/sla", response_model=sla_schema.SlaReport, response_model_exclude_none=True)
+async def read_sla(
+    metric: SlaMetric = SlaMetric.first_response,
+    granularity: SlaGranularity = SlaGranularity.hour,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    group_by: str = Query("none", pattern="^(none|agent|category|bucket)$"),
+    agent_id: Optional[DbId] = None,
+    category_id: Optional[DbId] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_admin),
+):
+    """
+    p50 / p90 / p99 first-response or resolution time, from the hourly or daily
+    rollups. Default range: the last 24 hours (hour) or 30 days (day).
+    """
+    items = await sla_ops.get_percentiles(
+        db, metric, granularity, since=since, until=until,
+        group_by=group_by, agent_id=agent_id, category_id=category_id,
+    )
+    return {"metric": metric, "granularity": granularity, "group_by": group_by, "items": items}
+
+
+@router.get("/priority-rules", response_model=List[priority_rule_schema.PriorityRuleOut])
+async def read_priority_rules(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_admin),
+):
+    """Keyword rules of the priority scorer."""
+    return await priority_rule_ops.get_rules(db)
+
+
+@router.post("/priority-rules", response_model=priority_rule_schema.PriorityRuleOut, status_code=status.HTTP_201_CREATED)
+async def create_priority_rule(
+    rule_data: priority_rule_schema.PriorityRuleCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_admin),
+):
+    """Adds a keyword rule; new tickets are scored with it right away."""
+    try:
+        return await priority_rule_ops.create_rule(db, rule_data)
+    except IntegrityError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A rule for this keyword already exists")
+
+
+@router.put("/priority-rules/{rule_id}", response_model=priority_rule_schema.PriorityRuleOut)
+async def update_priority_rule(
+    rule_id: DbId,
+    rule_data: priority_rule_schema.PriorityRuleUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_admin),
+):
+    try:
+        db_rule = await priority_rule_ops.update_rule(db, rule_id, rule_data)
+    except IntegrityError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A rule for this keyword already exists")
+    if not db_rule:
+        raise HTTPException(status_code=404, detail="Priority rule not found")
+    return db_rule
+
+
+@router.delete("/priority-rules/{rule_id}", response_model=priority_rule_schema.PriorityRuleOut)
+async def delete_priority_rule(
+    rule_id: DbId,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_admin),
+):
+    db_rule = await priority_rule_ops.delete_rule(db, rule_id)
+    if not db_rule:
+        raise HTTPException(status_code=404, detail="Priority rule not found")
+    return db_rule
+
+
+@router.post("/priority-rules/score", response_model=priority_rule_schema.ScoreResponse)
+async def score_priorities(
+    request: priority_rule_schema.ScoreRequest,
+    current_user: Principal = Depends(get_current_admin),
+):
+    """Scores a batch of tickets with the current rules (re-scoring jobs, import previews)."""
+    return {"priorities": await priority_rule_ops.score_tickets(request.tickets)}
+
+
+@router.post("/tickets/import", response_model=bulk_import_schema.BulkImportResult)
+async def import_tickets(
+    request: Request,
+    format: str = Query("jsonl", pattern="^(jsonl|csv)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_admin),
+):
+    """
+    Creates tickets from the request body: one JSON object per line (jsonl) or
+    a CSV file with a header row. Rows without a creator are created as the
+    calling admin. Invalid rows are skipped and listed in errors.
+    """
+    try:
+        data = (await request.body()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8 text")
+    return await bulk_import_ops.import_tickets(db, data, format, current_user.id)
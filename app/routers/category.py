@@ -3,13 +3,18 @@
 2 List and List by id are open to all
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.database import get_db
+from app.core.category_cache import category_cache
+from app.core.etag import conditional, weak_etag
 from app.dependencies import get_current_user # Assuming you have a general get_current_user
+from app.core.principal_cache import Principal
 from app.operations import category as category_ops
 from app.schemas import category as category_schema
+from app.schemas.ids import DbId
 from app.models.user import UserRole
 from app.models.category import Category
 from app.models.subcategory import Subcategory
@@ -20,35 +25,41 @@ router = APIRouter(prefix="/categories", tags=["Categories"])
 # Dependency
 
 @router.get("/", response_model=List[category_schema.Category])
-def read_categories(
+async def read_categories(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    
 ):
     """
    every user can see all categories and subcategories count
     """
-    return category_ops.all_categories(db)
+    # served from the in-process tree cache, the database is only read on a miss
+    tree = await category_cache.get()
+    # the same tree has the same version on every worker: 304 while it is unchanged
+    if (not_modified := conditional(request, response, weak_etag("categories", tree.version, skip, limit), private=False)) is not None:
+        return not_modified
+    return tree.categories[skip:skip + limit]
 
 #everybody can see category by id, having subcategories(Id, Name)
 @router.get("/{category_id}", response_model=category_schema.Category)
-def read_category_by_id(
-    category_id: int,
-    db: Session = Depends(get_db),
-    
+async def read_category_by_id(
+    category_id: DbId,
 ):
     """
     Retrieves a category by ID, including its subcategories.
     """
-    return category_ops.category_by_id(db, category_id)
+    category = (await category_cache.get()).by_id.get(category_id)
+    if not category:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return category
 
 #only admin and agent can create, update, delete category
 @router.post("/", response_model=category_schema.Category)
-def create_category(
+async def create_category(
     category_data: category_schema.CategoryCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
     
 ):
     """
@@ -56,43 +67,52 @@ def create_category(
     """
     if(current_user.role != UserRole.admin and current_user.role != UserRole.agent):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to create a category.")
-    return category_ops.create_category(db, category_data)
+    return await category_ops.create_category(db, category_data)
 
 @router.put("/{category_id}", response_model=category_schema.Category)
-def update_category(
-    category_id: int,
+async def update_category(
+    category_id: DbId,
     category_data: category_schema.CategoryUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Updates an existing category.
     """
     if(current_user.role != UserRole.admin and current_user.role != UserRole.agent):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to update a category.")
-    return category_ops.update_category(db, category_id, category_data)
+    db_category = await category_ops.update_category(db, category_id, category_data)
+    if not db_category:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return db_category
 
 @router.delete("/{category_id}", response_model=category_schema.Category)
-def delete_category(
-    category_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def delete_category(
+    category_id: DbId,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Deletes a category.
     """
     if(current_user.role != UserRole.admin and current_user.role != UserRole.agent):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to delete a category.")
-    return category_ops.delete_category(db, category_id)
+    try:
+        db_category = await category_ops.delete_category(db, category_id)
+    except IntegrityError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Category is still used by tickets")
+    if not db_category:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return db_category
 
 
 #Post request to create sub-category under category, raise no category founder under {id}
 @router.post("/{category_id}/subcategories", response_model=category_schema.Subcategory)
-def create_subcategory_with_category_id(
-    category_id: int,
+async def create_subcategory_with_category_id(
+    category_id: DbId,
     subcategory_data: category_schema.SubcategoryCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Creates a new subcategory under a specific category.
@@ -100,9 +120,9 @@ def create_subcategory_with_category_id(
     if(current_user.role != UserRole.admin and current_user.role != UserRole.agent):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to create a subcategory.")
     #if category_id is not valid raise error
-    if not db.query(Category).filter(Category.id == category_id).first():
+    if not await db.get(Category, category_id):
         raise HTTPException(status_code=404, detail="Category not found under {id}")
-    return category_ops.create_subcategory_with_category_id(db, subcategory_data, category_id)
+    return await category_ops.create_subcategory_with_category_id(db, subcategory_data, category_id)
 
 
 
@@ -1,31 +1,39 @@
 #websocket message router
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
+import json
+from functools import partial
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import StreamingResponse
+from app.database import AsyncSessionLocal, get_read_db, read_session_for
 from app.operations import message as message_ops
-from app.schemas.messages import MessageCreate
+from app.schemas.ids import MAX_DB_ID, DbId
+from app.schemas.messages import MessageCreate, MessageOut, MessageWindow
 from app.models.user import User, UserRole
 from app.models.ticket import Ticket
 from app.models.message import Message
-from fastapi import WebSocket, status
+from fastapi import WebSocket, WebSocketDisconnect, status
 from jose import JWTError, jwt
-from app.core import security
+from app.core import security, settings
+from app.core.chat_bus import chat_bus, message_payload
+from app.core.connection_manager import Connection
+from app.core.message_writer import message_writer
 
 #http exception
 from fastapi import HTTPException
 
-from app.dependencies import get_current_user, get_current_agent, get_current_admin
+from app.dependencies import get_current_user, get_current_agent, get_current_admin, load_principal
+from app.core.principal_cache import Principal
 
 from fastapi import WebSocket
 
 router = APIRouter(prefix="/messages", tags=["Messages"])
 
-#load all messages for ticket_id 
+PONG = json.dumps({"type": "pong"})
 
-@router.get("/{ticket_id}")
-def get_messages(ticket_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+async def _readable_ticket(db: AsyncSession, ticket_id: int, current_user: Principal) -> Ticket:
+    ticket = await db.get(Ticket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
     #only creator, agent (if assigned), admin can access    
@@ -33,9 +41,47 @@ def get_messages(ticket_id: int, db: Session = Depends(get_db), current_user: Us
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to access this ticket.")
     if current_user.role == UserRole.agent and ticket.agent_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to access this ticket.")
-    if current_user.role == UserRole.admin:
-        return message_ops.get_old_messages_for_ticket_id(db, ticket.id)
-    return message_ops.get_old_messages_for_ticket_id(db, ticket.id)
+    return ticket
+
+#load a window of messages for ticket_id
+
+@router.get("/{ticket_id}", response_model=MessageWindow)
+async def get_messages(
+    ticket_id: DbId,
+    before_id: int | None = Query(None, ge=0, le=MAX_DB_ID),
+    after_id: int | None = Query(None, ge=0, le=MAX_DB_ID),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    if before_id is not None and after_id is not None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Pass before_id or after_id, not both")
+    ticket = await _readable_ticket(db, ticket_id, current_user)
+    messages, has_more = await message_ops.get_old_messages_for_ticket_id(
+        db, ticket.id, before_id=before_id, after_id=after_id, limit=limit
+    )
+    return {"items": messages, "has_more": has_more}
+
+#stream every message for ticket_id as NDJSON
+
+@router.get("/{ticket_id}/stream")
+async def stream_messages(
+    ticket_id: DbId,
+    request: Request,
+    after_id: int = Query(0, ge=0, le=MAX_DB_ID),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    ticket = await _readable_ticket(db, ticket_id, current_user)
+
+    # the dependency's session is closed before the body is sent: the stream reads in its own,
+    # from the same database the dependency chose (the primary right after the caller wrote)
+    async def lines():
+        async with read_session_for(request) as stream_db:
+            async for row in message_ops.stream_messages_for_ticket_id(stream_db, ticket.id, after_id=after_id):
+                yield MessageOut.model_validate(row).model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 # @router.websocket("/{ticket_id}")
@@ -47,8 +93,45 @@ def get_messages(ticket_id: int, db: Session = Depends(get_db), current_user: Us
 #         await websocket.send_text(f"Message text was: {data}")  
 
 
+def _send_ack(connection: Connection, client_id: str | None, written):
+    """Durable ack of one message to its sender: its id once committed, or the error."""
+    if written.exception() is not None:
+        connection.send(json.dumps({"ack": client_id, "error": "Message could not be saved"}))
+    else:
+        connection.send(json.dumps({"ack": client_id, "id": written.result()}))
+
+
+async def _replay(websocket: WebSocket, connection: Connection, ticket_id: int, last_id: str):
+    """Sends a resuming client the messages after its last_id, then the live ones queued meanwhile."""
+    # joined (and listening) before reading: a message is replayed, queued live, or both, never lost
+    sent_ids = set()
+    try:
+        after_id = int(last_id)
+    except ValueError:
+        after_id = None
+    if after_id is None or not 0 <= after_id <= MAX_DB_ID:
+        # not a message id: the client reloads the history
+        await websocket.send_text(json.dumps({"resync": True}))
+    else:
+        # the primary: everything committed before the join is there
+        async with AsyncSessionLocal() as db:
+            rows, has_more = await message_ops.get_old_messages_for_ticket_id(
+                db, ticket_id, after_id=after_id, limit=settings.WS_RESUME_MAX_MESSAGES
+            )
+        if has_more:
+            # too far behind to replay: the client reloads the history
+            await websocket.send_text(json.dumps({"resync": True}))
+        else:
+            for row in rows:
+                await websocket.send_text(json.dumps(
+                    message_payload(row.id, row.ticket_id, row.content, row.sender_id, row.sender_name, row.timestamp)
+                ))
+                sent_ids.add(row.id)
+    connection.resume(sent_ids)
+
+
 @router.websocket("/{ticket_id}")
-async def websocket_endpoint(websocket: WebSocket, ticket_id: int, db: Session = Depends(get_db)):
+async def websocket_endpoint(websocket: WebSocket, ticket_id: DbId):
     await websocket.accept()
 
     # Get token from query params or headers
@@ -57,29 +140,18 @@ async def websocket_endpoint(websocket: WebSocket, ticket_id: int, db: Session =
         await websocket.close(code=1008)
         return
 
-    # Use your existing token verification logic
-    try:
-        payload = security.decode_access_token(token)
-        user_id: int | None = payload.get("sub")
-        if user_id is None:
-            await websocket.close(code=1008)
-            return
-       
-    except JWTError:
+    # Use your existing token verification logic (None for an invalid or expired token)
+    payload = security.decode_access_token(token)
+    user_id: int | None = payload.get("sub") if payload else None
+    if user_id is None:
         await websocket.close(code=1008)
         return
 
-    # Get current_user manually (reuse DB + user_id)
-    current_user = db.query(User).filter(User.id == user_id).first()
-    if not current_user:
-        await websocket.close(code=1008)
-        return
-
-    # Fetch ticket and check authorization
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-    print("Ticket:", ticket.ticket_uid)
-    if not ticket:
-        
+    # a session for the checks only: none is held while the socket stays open
+    async with AsyncSessionLocal() as db:
+        current_user = await load_principal(db, int(user_id))
+        ticket = await db.get(Ticket, ticket_id) if current_user else None
+    if not current_user or not ticket:
         await websocket.close(code=1008)
         return
 
@@ -92,27 +164,55 @@ async def websocket_endpoint(websocket: WebSocket, ticket_id: int, db: Session =
         await websocket.close(code=1008)
         return
     # Admins pass automatically
+    awaiting_first_response = current_user.role == UserRole.agent and ticket.first_response_at is None
+    last_id = websocket.query_params.get("last_id")
+    connection = await chat_bus.join(websocket, ticket.id, current_user.id, paused=last_id is not None)
 
-    while True:
-        try:
-            data = await websocket.receive_json()
-            message = MessageCreate(**data)
-
-            if message.ticket_id != ticket.id:
-                print("Ticket ID mismatch")
-                await websocket.close(code=1008)
+    try:
+        if last_id is not None:
+            # same handling as a frame: a failed replay closes the socket, it does not escape the endpoint
+            try:
+                await _replay(websocket, connection, ticket.id, last_id)
+            except WebSocketDisconnect:
                 return
-
-            new_message = Message(
-                ticket_id=message.ticket_id,
-                content=message.content,
-                sender_id=current_user.id,
+            except Exception:
+                await websocket.close(code=1011)
+                return
+        while True:
+            try:
+                data = await connection.receive()
+                if data is None:
+                    # closed by the server: silent client, or one too slow to keep up
+                    break
+                try:
+                    frame = json.loads(data)
+                    if isinstance(frame, dict) and frame.get("type") in ("ping", "pong"):
+                        if frame["type"] == "ping":
+                            connection.send(PONG)
+                        continue
+                    message = MessageCreate.model_validate(frame)
+                except ValueError:
+                    # a malformed frame is answered, not fatal
+                    connection.send(json.dumps({"error": "Invalid message"}))
+                    continue
+
+                if message.ticket_id != ticket.id:
+                    await websocket.close(code=1008)
+                    return
+
+                # queued, not written: the ack with the message id follows once it is
+                # committed, and everyone on the ticket receives it through the chat bus
+                written = await message_writer.submit(
+                    ticket.id, current_user.id, current_user.name, message.content,
+                    first_response=awaiting_first_response,
                 )
-            
-            db.add(new_message)
-            db.commit()
-            db.refresh(new_message)
-            await websocket.send_json({"message": new_message.content, "sender_name": current_user.name, "sender_id": current_user.id})
-        except Exception as e:
-            await websocket.close(code=1011)
-            break
+                awaiting_first_response = False
+                written.add_done_callback(partial(_send_ack, connection, message.client_id))
+            except WebSocketDisconnect:
+                # the client left, or the room closed the socket (slow client)
+                break
+            except Exception as e:
+                await websocket.close(code=1011)
+                break
+    finally:
+        await chat_bus.leave(connection)
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.exc import IntegrityError
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.core.category_cache import category_cache
+from app.core.etag import conditional, weak_etag
+from app.database import get_db, get_read_db
 from app.dependencies import get_current_user # Assuming you have a general get_current_user
+from app.core.principal_cache import Principal
 from app.operations import ticket as ticket_ops
 from app.schemas import ticket as ticket_schema
 from app.schemas import ticket_note_create
+from app.schemas.ids import DbId
+from app.schemas.pagination import Page
 
 
 from app.models import user as user_model
@@ -20,39 +26,49 @@ from app.models.ticket_note import TicketNote
 
 router = APIRouter(prefix="/tickets", tags=["Tickets"])
 
-@router.get("/", response_model=List[ticket_schema.TicketOut])
-def read_tickets_for_user(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user)
+@router.get("/", response_model=Page[ticket_schema.TicketOut])
+async def read_tickets_for_user(
+    request: Request,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Retrieves tickets based on the user's role:
     - Admin: Sees all tickets.
     - Agent: Sees tickets assigned to them.
     - User: Sees tickets they created.
+    Answers 304 to an If-None-Match of the current ETag, without reading the page.
     """
     if current_user.role == UserRole.admin:
-        return ticket_ops.get_tickets(db, skip=skip, limit=limit)
+        scope = {}
     elif current_user.role == UserRole.agent:
-        return ticket_ops.get_tickets(db, agent_id=current_user.id, skip=skip, limit=limit)
+        scope = {"agent_id": current_user.id}
     else: # UserRole.user
-        return ticket_ops.get_tickets(db, user_id=current_user.id, skip=skip, limit=limit)
+        scope = {"user_id": current_user.id}
+    count, rows_hash = await ticket_ops.get_tickets_version(db, **scope)
+    category_version = (await category_cache.get()).version
+    etag = weak_etag("tickets", scope, cursor, limit, count, rows_hash, category_version)
+    if (not_modified := conditional(request, response, etag)) is not None:
+        return not_modified
+    tickets, next_cursor = await ticket_ops.get_tickets(db, cursor=cursor, limit=limit, **scope)
+    return {"items": tickets, "next_cursor": next_cursor}
 
 
 #create ticket if jwt is valid under user's id acquired from jwt
 
 
 @router.patch("/{ticket_id}/status", response_model=ticket_schema.Ticket)
-def update_ticket_status(
-    ticket_id: int,
+async def update_ticket_status(
+    ticket_id: DbId,
     status_update: ticket_schema.TicketUpdateStatus,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Allows Creator, Agent, or Admin to change a ticket's status."""
-    db_ticket = ticket_ops.get_ticket(db, ticket_id)
+    db_ticket = await ticket_ops.get_ticket(db, ticket_id)
     if not db_ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
@@ -64,7 +80,7 @@ def update_ticket_status(
     if not (is_admin or is_assigned_agent or is_creator):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this ticket")
 
-    return ticket_ops.update_ticket_status(db, db_ticket=db_ticket, status=status_update.status)
+    return await ticket_ops.update_ticket_status(db, db_ticket=db_ticket, status=status_update.status)
 
 # @router.post("/{ticket_id}/transfer", status_code=status.HTTP_202_ACCEPTED)
 # def request_ticket_transfer(
@@ -129,41 +145,56 @@ def update_ticket_status(
 
 #create ticket  
 @router.post("/", response_model=ticket_schema.Ticket)
-def create_ticket(
+async def create_ticket(
     ticket_data: ticket_schema.TicketCreate,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Allows a user to create a new ticket."""
-    if not db.query(Category).filter(Category.id == ticket_data.category_id).first():
+    # validated against the in-process category tree, no query per ticket
+    await _check_category(ticket_data)
+    try:
+        return await ticket_ops.create_ticket(db, ticket_data, current_user.id)
+    except IntegrityError:
+        # the cached tree may be behind a deletion made on another worker: reload it and check again
+        category_cache.invalidate()
+        await _check_category(ticket_data)
+        raise
+
+
+async def _check_category(ticket_data: ticket_schema.TicketCreate):
+    category = (await category_cache.get()).by_id.get(ticket_data.category_id)
+    if not category:
         raise HTTPException(status_code=404, detail="Category not found")
-    
-    return ticket_ops.create_ticket(db, ticket_data, current_user.id)
+    if ticket_data.subcategory_id is not None and not category.has_subcategory(ticket_data.subcategory_id):
+        raise HTTPException(status_code=404, detail="Subcategory not found in this category")
 
 
 @router.post("/{ticket_id}/request/reopen", response_model=ticket_schema.Ticket)
-def request_reopen_ticket(
-    ticket_id: int,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user)
+async def request_reopen_ticket(
+    ticket_id: DbId,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Allows a user to reopen a closed ticket."""
-    db_ticket = ticket_ops.get_ticket(db, ticket_id)
+    db_ticket = await ticket_ops.get_ticket(db, ticket_id)
     if not db_ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
     if db_ticket.status != TicketStatus.closed:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Ticket is not closed")
     
-    return ticket_ops.request_reopen_ticket(db, db_ticket)
+    return await ticket_ops.request_reopen_ticket(db, db_ticket)
 
 @router.get("/reopen/requests")
-def get_reopen_requests(
+async def get_reopen_requests(
     user_email: str | None = None,
     username: str | None = None,
     ticket_title: str | None = None,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     if current_user.role != UserRole.admin:
         raise HTTPException(
@@ -173,19 +204,19 @@ def get_reopen_requests(
 
     # Combine filters if needed
     search_query = user_email or username or ticket_title
-    return ticket_ops.get_all_reopen_requests(db, search_query)
+    return await ticket_ops.get_all_reopen_requests(db, search_query, skip=skip, limit=limit)
 
 
 @router.post("/{ticket_id}/reopen", response_model=ticket_schema.Ticket)
-def reopen_ticket(
-    ticket_id: int,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user)
+async def reopen_ticket(
+    ticket_id: DbId,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Allows a user to reopen a closed ticket."""
     #if role is admin OR role is assigned agent he can reopen
 
-    db_ticket = ticket_ops.get_ticket(db, ticket_id)
+    db_ticket = await ticket_ops.get_ticket(db, ticket_id)
 
     if not db_ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
@@ -204,37 +235,66 @@ def reopen_ticket(
     )
 
     if can_accept:
-        return ticket_ops.accept_reopen_ticket(db, db_ticket)
+        return await ticket_ops.accept_reopen_ticket(db, db_ticket)
     else:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to reopen this ticket")
 
 
 @router.get("/search", response_model=List[ticket_schema.Ticket])
-def search_tickets(
+async def search_tickets(
     search_query: str,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user)
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Search for tickets by title or user's name."""
+    """Ranked search by ticket uid, id, title, description or the user's name / email."""
     if current_user.role != UserRole.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can search tickets")
-    return ticket_ops.search_tickets(db, search_query)
+    return await ticket_ops.search_tickets(db, search_query, skip=skip, limit=limit)
 
 
 @router.post("/{ticket_id}/note")
-def create_ticket_note(
-    ticket_id: int,
+async def create_ticket_note(
+    ticket_id: DbId,
     note: ticket_note_create.TicketNoteCreate,
-    db: Session = Depends(get_db),
-    current_user: user_model.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Allows a agent to create a note for a ticket."""
-    db_ticket = ticket_ops.get_ticket(db, ticket_id)
+    db_ticket = await ticket_ops.get_ticket(db, ticket_id)
     if not db_ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
     
     if current_user.role != UserRole.agent:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only agents can create notes")
     ticket_note = TicketNote(ticket_id=ticket_id, agent_id=current_user.id, note_content=note.note)
-    return ticket_ops.create_ticket_note(db, ticket_note)
+    return await ticket_ops.create_ticket_note(db, ticket_note)
    
+
+
+@router.get("/{ticket_id}", response_model=ticket_schema.Ticket)
+async def read_ticket(
+    ticket_id: DbId,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """One ticket, for its creator, its agent or an admin; 304 to an If-None-Match of the current ETag."""
+    version = await ticket_ops.get_ticket_version(db, ticket_id)
+    if not version:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
+    if current_user.role == UserRole.user and version.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to access this ticket.")
+    if current_user.role == UserRole.agent and version.agent_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to access this ticket.")
+    category_version = (await category_cache.get()).version
+    etag = weak_etag("ticket", ticket_id, version.updated_at, version.user_updated_at, version.agent_updated_at,
+                     category_version)
+    if (not_modified := conditional(request, response, etag)) is not None:
+        return not_modified
+    db_ticket = await ticket_ops.get_ticket(db, ticket_id)
+    if not db_ticket:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
+    return db_ticket
@@ -1,46 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import SessionLocal
+from app.database import get_db, get_read_db
+from app.schemas.ids import DbId
 from app.schemas.user import UserCreate, UserUpdate, UserOut
+from app.schemas.pagination import Page
 from app.operations.user import get_user, get_users, create_user, update_user, delete_user
 from app.dependencies import get_current_user
+from app.core.etag import conditional, weak_etag
+from app.core.principal_cache import Principal
 from app.models.user import UserRole
 from app.operations.user import create_agent
 from app.models.user import User
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-@router.get("/", response_model=List[UserOut])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return get_users(db, skip=skip, limit=limit)
+@router.get("/", response_model=Page[UserOut])
+async def read_users(cursor: str | None = None, limit: int = Query(100, ge=1, le=500), db: AsyncSession = Depends(get_read_db)):
+    users, next_cursor = await get_users(db, cursor=cursor, limit=limit)
+    return {"items": users, "next_cursor": next_cursor}
 
 @router.get("/{user_id}", response_model=UserOut)
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = get_user(db, user_id)
+async def read_user(user_id: DbId, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    db_user = await get_user(db, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
+    # a user row is small: read it, but skip serializing and sending it while unchanged
+    if (not_modified := conditional(request, response, weak_etag("user", user_id, db_user.updated_at))) is not None:
+        return not_modified
     return db_user
 
 @router.post("/add_user", response_model=UserOut)
-def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = create_user(db, user)
+async def create_new_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await create_user(db, user)
     return db_user
 
 
 @router.post("/add_agent", response_model=UserOut)
-def add_agent(
+async def add_agent(
     user: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     # Role-based check
     if current_user.role != UserRole.admin:
@@ -49,7 +49,7 @@ def add_agent(
             detail="You do not have permission to add agents."
         )
     
-    db_user = create_agent(db, user)
+    db_user = await create_agent(db, user)
     return db_user
 
 
@@ -57,11 +57,11 @@ def add_agent(
 
 
 @router.put("/{user_id}", response_model=UserOut)
-def update_existing_user(
-    user_id: int,
+async def update_existing_user(
+    user_id: DbId,
     user: UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     # Only the user themselves or admin can update
     if current_user.id != user_id and current_user.role != UserRole.admin:
@@ -70,17 +70,17 @@ def update_existing_user(
             detail="You do not have permission to update this user."
         )
 
-    db_user = update_user(db, user_id, user)
+    db_user = await update_user(db, user_id, user)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
     return db_user
 
 @router.delete("/{user_id}", response_model=UserOut)
-def delete_existing_user(
-    user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def delete_existing_user(
+    user_id: DbId,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     # Only the user themselves or admin can delete
     if current_user.id != user_id and current_user.role != UserRole.admin:
@@ -89,7 +89,7 @@ def delete_existing_user(
             detail="You do not have permission to delete this user."
         )
 
-    db_user = delete_user(db, user_id)
+    db_user = await delete_user(db, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import Dict
+
+# Schemas for the admin / operations endpoints
+
+class PoolStats(BaseModel):
+    """Live connection pool counters for one engine in this worker."""
+    pool_size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    waits: int
+    timeouts: int
+    wait_ms_total: float
+    wait_ms_avg: float
+    wait_ms_max: float
+
+class DatabasePoolsOut(BaseModel):
+    worker_pid: int
+    pools: Dict[str, PoolStats]
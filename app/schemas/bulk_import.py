@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict
+from datetime import datetime
+
+from .ids import DbId
+
+class BulkTicketRow(BaseModel):
+    """One ticket of a bulk import (a JSONL object or a CSV row with these columns)."""
+    title: str = Field(min_length=1, max_length=255)
+    initial_description: str
+    category_id: DbId
+    subcategory_id: Optional[DbId] = None
+    # creator, by id or email; the importing admin when neither is given
+    user_id: Optional[DbId] = None
+    user_email: Optional[str] = None
+    # original creation time when migrating from another helpdesk
+    created_at: Optional[datetime] = None
+
+class RowError(BaseModel):
+    row: int  # line number in the input (CSV header is line 1)
+    error: str
+
+class BulkImportResult(BaseModel):
+    received: int
+    imported: int
+    failed: int
+    by_priority: Dict[str, int]
+    errors: List[RowError]
+    errors_truncated: bool = False
@@ -0,0 +1,9 @@
+from typing import Annotated
+
+from pydantic import Field
+
+# primary and foreign keys are int4 columns: asyncpg rejects a larger value as a
+# query argument (a 500), so ids from the client are bounded before any query
+MAX_DB_ID = 2**31 - 1
+
+DbId = Annotated[int, Field(ge=1, le=MAX_DB_ID)]
@@ -1,39 +1,31 @@
 #message base
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class MessageBase(BaseModel):
     content: str
     ticket_id: int
-    sender_id: int
-    sender_name: str
-    
-    
-    class Config:
-        from_attributes = True
 
-#message create
+#message create (a websocket frame; the sender is the authenticated user)
 
 class MessageCreate(MessageBase):
-    pass
+    # echoed in the ack of the message, to match it with the frame it came from
+    client_id: Optional[str] = None
 
 #message out
 
 class MessageOut(MessageBase):
     id: int
-    created_at: datetime
-    updated_at: datetime
-    
-    class Config:
-        from_attributes = True
-
-#Messages for ticket
-#id, content, sender id, sender name,
-
-
-
-
+    sender_id: int
+    sender_name: str
+    timestamp: datetime
 
+    model_config = ConfigDict(from_attributes=True)
 
+#Messages for ticket: a window of the history, oldest first
 
+class MessageWindow(BaseModel):
+    items: List[MessageOut]
+    # more messages beyond the window: before items[0] (before_id / latest) or after items[-1] (after_id)
+    has_more: bool
@@ -0,0 +1,42 @@
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import List
+from datetime import datetime
+from app.models.ticket import TicketPriority
+
+class PriorityRuleBase(BaseModel):
+    keyword: str = Field(min_length=1, max_length=100)
+    priority: TicketPriority
+
+    @field_validator("keyword")
+    @classmethod
+    def normalize_keyword(cls, keyword: str) -> str:
+        # matching is case-insensitive, rules are stored lowercase
+        keyword = keyword.strip().lower()
+        if not keyword:
+            raise ValueError("keyword must not be blank")
+        return keyword
+
+class PriorityRuleCreate(PriorityRuleBase):
+    pass
+
+class PriorityRuleUpdate(PriorityRuleBase):
+    pass
+
+class PriorityRuleOut(PriorityRuleBase):
+    id: int
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ScoreItem(BaseModel):
+    title: str
+    initial_description: str
+
+class ScoreRequest(BaseModel):
+    """Up to 10000 tickets scored in one call."""
+    tickets: List[ScoreItem] = Field(max_length=10000)
+
+class ScoreResponse(BaseModel):
+    """Priorities in the order of the request."""
+    priorities: List[TicketPriority]
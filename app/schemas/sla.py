@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+from app.models.sla_rollup import SlaGranularity, SlaMetric
+
+class SlaPercentiles(BaseModel):
+    # the group, depending on group_by
+    agent: Optional[int] = None  # 0: no agent
+    category: Optional[int] = None
+    bucket: Optional[datetime] = None
+    tickets: int
+    p50_seconds: float
+    p90_seconds: float
+    p99_seconds: float
+
+class SlaReport(BaseModel):
+    metric: SlaMetric
+    granularity: SlaGranularity
+    group_by: str
+    items: List[SlaPercentiles]
@@ -1,9 +1,10 @@
 
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 from .category import CategoryNameOnlyOut, SubcategoryNameOnlyOut, Category, Subcategory
 
+from .ids import DbId
 from .user import UserOut # Assuming you have a UserOut schema in schemas/user.py
 from app.models.ticket import TicketStatus, TicketPriority # Import enums from the model
 
@@ -12,14 +13,14 @@ class TicketBase(BaseModel):
     initial_description: str
 
 class TicketCreate(TicketBase):
-    category_id: int
-    subcategory_id: Optional[int] = None
+    category_id: DbId
+    subcategory_id: Optional[DbId] = None
 
 class TicketUpdateStatus(BaseModel):
     status: TicketStatus
 
 class TicketTransferRequestCreate(BaseModel):
-    to_agent_id: int
+    to_agent_id: DbId
     reason: Optional[str] = None
 
 class Ticket(TicketBase):
@@ -29,6 +30,8 @@ class Ticket(TicketBase):
     priority: TicketPriority
     created_at: datetime
     updated_at: datetime
+    first_response_at: Optional[datetime] = None
+    resolved_at: Optional[datetime] = None
     user: UserOut
     agent: Optional[UserOut] = None
     category: Category
@@ -41,6 +44,16 @@ class DashboardStats(BaseModel):
     total_tickets: int
     resolved_tickets: int
     pending_tickets: int
+    unassigned_tickets: int = 0
+    by_status: Dict[str, int] = {}
+    by_priority: Dict[str, int] = {}
+    by_category: Dict[int, int] = {}  # category id -> tickets
+    by_agent: Dict[int, int] = {}  # agent id -> tickets assigned to them
+
+class TicketStatsReconcileOut(BaseModel):
+    tickets: int  # tickets counted
+    corrected_rows: int  # counter rows that had drifted
+    drift: int  # sum of the corrections
 
 #out
 
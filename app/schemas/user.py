@@ -10,11 +10,14 @@ class UserRole(str, Enum):
 # Schema for reading user data
 class UserBase(BaseModel):
     name: str
-    email: EmailStr
+    # a plain str: stored emails were checked when created, and EmailStr (email_validator + idna)
+    # dominated the cost of every response embedding users (tickets, pages of tickets)
+    email: str
     role: UserRole
     profile_photo_url: Optional[str] = None
 
 class UserCreate(UserBase):
+    email: EmailStr
     password: str  # Plain password, will be hashed
 
 class UserUpdate(BaseModel):
@@ -1,18 +1,31 @@
+import asyncio
 from typing import Union
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 
 from app.routers import user
-from app.database import Base, engine
+from app.database import Base, async_engine, engine
 from app.auth import router as auth
 from app.routers import ticket
 from app.routers import ticket_transfer
 from app.routers import category
 from app.routers import message_ws
+from app.routers import admin
+from app.core import settings
 from app.core.seed_category import seed_categories
+from app.core.read_routing import ReadYourWritesMiddleware
+from app.core.pagination import InvalidCursor
+from app.core.ticket_uid import ticket_uid_generator
+from app.core.chat_bus import chat_bus
+from app.core.message_writer import message_writer
+from app.core.agent_load import rebuild_agent_load_index, resync_agent_load_forever
+from app.core.password_pool import PasswordPoolBusy, shutdown_password_pool, start_password_pool
 
-# Create all tables (development only)
-Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic (alembic upgrade head). DB_CREATE_ALL=true
+# keeps the old create_all shortcut for throwaway development databases.
+if settings.DB_CREATE_ALL:
+    Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     description="My FastAPI project with Swagger",
@@ -21,9 +34,50 @@ app = FastAPI(
     redoc_url="/redoc"
 
 )
+app.add_middleware(ReadYourWritesMiddleware)
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)})
+
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy_handler(request: Request, exc: PasswordPoolBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+    )
+
 @app.on_event("startup")
 def on_startup():
     seed_categories()
+    start_password_pool()
+
+@app.on_event("startup")
+async def start_agent_load_index():
+    await rebuild_agent_load_index()
+    app.state.agent_load_resync = asyncio.create_task(resync_agent_load_forever())
+
+@app.on_event("startup")
+async def claim_ticket_uid_worker_id():
+    await ticket_uid_generator.claim_worker_id(async_engine)
+
+@app.on_event("startup")
+async def start_chat_bus():
+    chat_bus.start(async_engine)
+    message_writer.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    shutdown_password_pool()
+    app.state.agent_load_resync.cancel()
+
+@app.on_event("shutdown")
+async def release_ticket_uid_worker_id():
+    await ticket_uid_generator.release()
+
+@app.on_event("shutdown")
+async def stop_chat_bus():
+    await message_writer.stop()
+    await chat_bus.stop()
 
 
 app.include_router(user.router)
@@ -32,4 +86,5 @@ app.include_router(ticket.router)
 app.include_router(ticket_transfer.router)
 app.include_router(category.router)
 app.include_router(message_ws.router)
+app.include_router(admin.router)
 